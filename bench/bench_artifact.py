@@ -0,0 +1,52 @@
+# -*- coding: utf-8 -*-
+"""
+compares building 400 schemas with loading them from an artifact.
+
+Run with:
+
+  PYTHONPATH=src python bench/bench_artifact.py
+"""
+
+import os
+import re
+import tempfile
+import time
+
+import validino as V
+from validino import artifact
+
+
+def build():
+    schemas = {}
+    for i in range(400):
+        codes = frozenset('%s-%d' % (i, n) for n in range(500))
+        schemas['schema%d' % i] = V.Schema(
+            dict(
+                name=(V.strip, V.not_empty(), V.clamp_length(max=255)),
+                code=(V.strip, V.belongs(codes)),
+                ref=V.regex(r'^[A-Z]{2}%d-\d{4,8}(?:-[a-z]+)?$' % i),
+                age=V.either(V.empty(), V.all_of(
+                    V.to_integer(), V.clamp(min=0, max=130))),
+                ))
+    return schemas
+
+
+def main():
+    # a fresh worker has nothing in the re module's cache
+    re.purge()
+    t0 = time.perf_counter()
+    schemas = build()
+    t1 = time.perf_counter()
+    path = os.path.join(tempfile.mkdtemp(), 'schemas.vart')
+    artifact.save(schemas, path, version='bench')
+    t2 = time.perf_counter()
+    artifact.load(path, version='bench')
+    t3 = time.perf_counter()
+    print("build  %8.1f ms" % ((t1 - t0) * 1e3))
+    print("save   %8.1f ms" % ((t2 - t1) * 1e3))
+    print("load   %8.1f ms  (%d bytes)" % (
+        (t3 - t2) * 1e3, os.path.getsize(path)))
+
+
+if __name__ == '__main__':
+    main()
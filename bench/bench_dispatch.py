@@ -0,0 +1,57 @@
+# -*- coding: utf-8 -*-
+"""
+compares dispatch_on_type() with the equivalent either() chain for
+values of each branch's type, a subclass, and an unmatched type.
+
+Run with:
+
+  PYTHONPATH=src python bench/bench_dispatch.py
+"""
+
+import timeit
+
+import validino as V
+from validino.base import Invalid
+
+
+class Code(str):
+    pass
+
+
+VALUES = [
+    ('int', 42),
+    ('str', ' abc '),
+    ('list', [1, 2]),
+    ('str subclass', Code(' abc ')),
+    ('unmatched', 1.5),
+]
+
+
+def run(label, validator, value, number=100000):
+    def go():
+        try:
+            validator(value)
+        except Invalid:
+            pass
+    t = timeit.timeit(go, number=number)
+    print("%-34s %8.3f us/value" % (label, t / number * 1e6))
+
+
+def main():
+    chain = V.either(
+        V.all_of(V.confirm_type(int), V.clamp(min=0)),
+        V.all_of(V.is_string(), V.strip, V.not_empty()),
+        V.all_of(V.confirm_type(list), V.to_list()),
+    )
+    dispatch = V.dispatch_on_type({
+        int: V.clamp(min=0),
+        str: (V.strip, V.not_empty()),
+        list: V.to_list(),
+    })
+    for kind, value in VALUES:
+        run("either(), %s" % kind, chain, value)
+        run("dispatch_on_type(), %s" % kind, dispatch, value)
+
+
+if __name__ == '__main__':
+    main()
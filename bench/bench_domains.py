@@ -0,0 +1,84 @@
+# -*- coding: utf-8 -*-
+"""
+compares a set, a SortedFileDomain and a SortedFileDomain behind a
+Bloom filter as the domain of not_belongs(): the time and memory
+taken to get ready in a fresh process, and the time per lookup for
+values in and not in the domain.
+
+Run with:
+
+  PYTHONPATH=src python bench/bench_domains.py [number of values]
+"""
+
+import os
+import resource
+import subprocess
+import sys
+import tempfile
+import time
+import timeit
+
+import validino as V
+
+
+def values(n):
+    return ('%016x' % (i * 2654435761 % (1 << 64)) for i in range(n))
+
+
+def rss():
+    # ru_maxrss survives exec, so would include the parent's build
+    try:
+        with open('/proc/self/status') as f:
+            for line in f:
+                if line.startswith('VmRSS:'):
+                    return int(line.split()[1]) / 1024
+    except OSError:
+        pass
+    return resource.getrusage(resource.RUSAGE_SELF).ru_maxrss / 1024
+
+
+def child(kind, path, n):
+    start = time.perf_counter()
+    if kind == 'set':
+        with open(path) as f:
+            domain = set(line.rstrip('\n') for line in f)
+    elif kind == 'mmap':
+        domain = V.SortedFileDomain(path)
+    else:
+        domain = V.SortedFileDomain(path, bloom=path + '.bloom')
+    ready = time.perf_counter() - start
+    v = V.not_belongs(domain)
+    present = list(values(min(n, 1000)))
+    absent = ['x%015d' % i for i in range(1000)]
+
+    def lookups(sample):
+        def go():
+            for value in sample:
+                try:
+                    v(value)
+                except V.Invalid:
+                    pass
+        return timeit.timeit(go, number=20) / 20 / len(sample) * 1e6
+
+    hit, miss = lookups(present), lookups(absent)
+    print("%-12s ready %8.3f s  RSS %8.1f MB  "
+          "present %6.2f us  absent %6.2f us" % (
+              kind, ready, rss(), hit, miss))
+
+
+def main():
+    n = int(sys.argv[1]) if len(sys.argv) > 1 else 1000000
+    with tempfile.TemporaryDirectory() as tmp:
+        path = os.path.join(tmp, 'domain.txt')
+        V.build_domain(values(n), path, bloom_path=path + '.bloom')
+        print("%d values, %.1f MB file" % (n, os.path.getsize(path) / 1e6))
+        for kind in ('set', 'mmap', 'mmap+bloom'):
+            subprocess.check_call([
+                sys.executable, __file__, '--child', kind, path, str(n)])
+
+
+if __name__ == '__main__':
+    if sys.argv[1:2] == ['--child']:
+        child(sys.argv[2], sys.argv[3], int(sys.argv[4]))
+    else:
+        main()
@@ -0,0 +1,38 @@
+# -*- coding: utf-8 -*-
+"""
+benchmarks excursion() against large lists and dicts.
+
+Run with:
+
+  PYTHONPATH=src python bench/bench_excursion.py
+"""
+
+import timeit
+
+import validino as V
+
+
+def run(label, validator, value, number=200):
+    t = timeit.timeit(lambda: validator(value), number=number)
+    print("%-40s %10.2f us/call" % (label, t / number * 1e6))
+
+
+def main():
+    for size in (1000, 100000):
+        items = list(range(size))
+        mapping = dict.fromkeys(map(str, items))
+        pure = (V.is_list(), V.clamp_length(max=size))
+        print("size=%d" % size)
+        run("list, auto (pure)", V.excursion(*pure), items)
+        run("list, shallow", V.excursion(*pure, mode='shallow'), items)
+        run("dict, auto (pure)",
+            V.excursion(V.clamp_length(max=size)), mapping)
+        run("dict, shallow",
+            V.excursion(V.clamp_length(max=size), mode='shallow'), mapping)
+        run("dict, deep",
+            V.excursion(V.clamp_length(max=size), mode='deep'), mapping,
+            number=5)
+
+
+if __name__ == '__main__':
+    main()
@@ -0,0 +1,55 @@
+# -*- coding: utf-8 -*-
+"""
+measures the memory taken by many schemas built from the same
+validators, with the factories interning their validators and with
+the plain factories they wrap.
+
+Run with:
+
+  PYTHONPATH=src python bench/bench_memory.py
+"""
+
+import gc
+import tracemalloc
+
+import validino as V
+
+TENANTS = 5000
+
+
+def schema(factories):
+    f = factories
+    return V.Schema(dict(
+        name=(V.strip, f['not_empty'](), f['clamp_length'](max=255)),
+        email=(V.strip, f['clamp_length'](max=255)),
+        age=(f['to_integer'](), f['clamp'](min=0, max=150)),
+        country=(f['belongs'](('GB', 'FR', 'DE')),),
+        code=(f['regex'](r'[A-Z]{3}\d{4}$'),),
+    ))
+
+
+def measure(label, factories):
+    gc.collect()
+    tracemalloc.start()
+    schemas = [schema(factories) for i in range(TENANTS)]
+    size = tracemalloc.get_traced_memory()[0]
+    tracemalloc.stop()
+    validators = TENANTS * 7
+    print("%-12s %8.1f MB for %d schemas, %6.0f bytes per validator" % (
+        label, size / 1e6, TENANTS, size / validators))
+    return schemas
+
+
+NAMES = ['not_empty', 'clamp_length', 'to_integer', 'clamp', 'belongs',
+         'regex']
+
+
+def main():
+    plain = dict((n, getattr(V, n).__wrapped__) for n in NAMES)
+    interned = dict((n, getattr(V, n)) for n in NAMES)
+    measure("plain", plain)
+    measure("interned", interned)
+
+
+if __name__ == '__main__':
+    main()
@@ -0,0 +1,75 @@
+# -*- coding: utf-8 -*-
+"""
+compares nested() with the recursive implementation it replaced on
+documents from a few to a few thousand levels deep.
+
+Run with:
+
+  PYTHONPATH=src python bench/bench_nested.py
+"""
+
+import timeit
+
+import validino as V
+from validino.base import Invalid
+
+
+def legacy_nested(**kwargs):
+    # nested() before the iterative engine
+    def f(value, context=None):
+        data = dict()
+        errors = dict()
+        for k, v in kwargs.items():
+            if isinstance(v, tuple):
+                v = V.all_of(*v)
+            try:
+                data[k] = v(value[k], context=context)
+            except (KeyError, TypeError):
+                errors[k] = "key %r is missing" % k
+            except Invalid as e:
+                errors[k] = e
+        if errors:
+            raise Invalid(errors)
+        return data
+
+    return f
+
+
+def document(factory, depth, leaf):
+    validator = V.to_integer()
+    data = leaf
+    for i in range(depth):
+        validator = factory(
+            name=(V.strip, V.not_empty()), child=validator)
+        data = dict(name=' node ', child=data)
+    return validator, data
+
+
+def run(label, factory, depth, leaf, number):
+    validator, data = document(factory, depth, leaf)
+
+    def go():
+        try:
+            validator(data)
+        except Invalid as e:
+            e.unpack_errors()
+
+    try:
+        t = timeit.timeit(go, number=number)
+    except RecursionError:
+        print("%-28s depth %5d   RecursionError" % (label, depth))
+    else:
+        print("%-28s depth %5d %10.1f us/doc" % (
+            label, depth, t / number * 1e6))
+
+
+def main():
+    for depth, number in ((3, 20000), (300, 200), (800, 50), (3000, 20)):
+        for leaf in ('1', 'x'):
+            kind = 'valid' if leaf == '1' else 'invalid'
+            run("legacy, %s" % kind, legacy_nested, depth, leaf, number)
+            run("nested, %s" % kind, V.nested, depth, leaf, number)
+
+
+if __name__ == '__main__':
+    main()
@@ -0,0 +1,50 @@
+# -*- coding: utf-8 -*-
+"""
+compares regex_any() with an either() chain of regex() validators
+over forty identifier formats, for values matching the first, a
+middle and the last pattern, and values matching none.
+
+Run with:
+
+  PYTHONPATH=src python bench/bench_regex_any.py
+"""
+
+import timeit
+
+import validino as V
+from validino.base import Invalid
+
+PATTERNS = [r'%s-\d{%d}$' % (prefix, 4 + i % 6)
+            for i, prefix in enumerate(
+                'AB AC AD AE AF AG AH AJ AK AL AM AN AP AQ AR AS AT AU AV AW '
+                'BA BC BD BE BF BG BH BJ BK BL BM BN BP BQ BR BS BT BU BV BW'
+                .split())]
+
+VALUES = [
+    ('first', 'AB-1234'),
+    ('middle', 'BA-1234'),
+    ('last', 'BW-123456789'),
+    ('none', 'ZZ-1234'),
+]
+
+
+def run(label, validator, value, number=20000):
+    def go():
+        try:
+            validator(value)
+        except Invalid:
+            pass
+    t = timeit.timeit(go, number=number)
+    print("%-24s %8.3f us/value" % (label, t / number * 1e6))
+
+
+def main():
+    chain = V.either(*[V.regex(p) for p in PATTERNS])
+    combined = V.regex_any(PATTERNS)
+    for where, value in VALUES:
+        run("either(), %s" % where, chain, value)
+        run("regex_any(), %s" % where, combined, value)
+
+
+if __name__ == '__main__':
+    main()
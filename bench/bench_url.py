@@ -0,0 +1,78 @@
+# -*- coding: utf-8 -*-
+"""
+compares url() with the implementation it replaced.
+
+Run with:
+
+  PYTHONPATH=src python bench/bench_url.py
+"""
+
+import timeit
+import urllib.parse
+
+import validino as V
+from validino.base import Invalid, _msg
+
+
+def legacy_url(
+    schemas=('http', 'https'), default_schema='http', default_host='',
+    msg=None
+):
+    # url() before the fast path, without the existence check
+    def f(value):
+        cant_check = (
+            f.check_exists and
+            set(f.schemas).difference(set(('http', 'https')))
+        )
+        if cant_check:
+            raise RuntimeError()
+        schema, netloc, path, params, query, fragment = urllib.parse.urlparse(
+            value
+        )
+        if schema not in f.schemas:
+            raise Invalid(_msg(f.msg, "url.schema", "schema not allowed"))
+        if schema == '' and f.default_schema:
+            schema = f.default_schema
+        if netloc == '' and f.default_host:
+            netloc = f.default_host
+        return urllib.parse.urlunparse(
+            (schema, netloc, path, params, query, fragment)
+        )
+
+    f.default_schema = default_schema
+    f.default_host = default_host
+    f.check_exists = False
+    f.schemas = schemas
+    f.msg = msg
+    return f
+
+
+URLS = [
+    'http://www.example.com/',
+    'https://news.example.org/2007/07/02/story.html?page=2#comments',
+    'http://cdn.example.net/a/b/c/d/e/f.png',
+    'https://example.com:8443/api/v1/items?id=42&sort=asc',
+]
+
+HOSTS = ['WWW.EXAMPLE%d.COM:80' % (i % 100) for i in range(1000)]
+
+
+def run(label, validator, urls, number=200):
+    def go():
+        for u in urls:
+            validator(u)
+    t = timeit.timeit(go, number=number)
+    print("%-30s %8.3f us/url" % (label, t / number / len(urls) * 1e6))
+
+
+def main():
+    run("legacy", legacy_url(), URLS, number=20000)
+    run("url()", V.url(), URLS, number=20000)
+    feed = ['http://%s/item' % h for h in HOSTS]
+    run("url(normalize=True)", V.url(normalize=True), feed)
+    run("url(normalize=True), no cache",
+        V.url(normalize=True, cache_size=0), feed)
+
+
+if __name__ == '__main__':
+    main()
@@ -0,0 +1,60 @@
+# -*- coding: utf-8 -*-
+"""
+compares uuid() and uuids() with the uuid() they replaced, for
+canonical, upper-case and braced strings and 16-byte values.
+
+Run with:
+
+  PYTHONPATH=src python bench/bench_uuid.py
+"""
+
+import functools
+import timeit
+import uuid as uuid_module
+from uuid import UUID, uuid1
+
+import validino as V
+from validino.base import Invalid, _msg
+
+
+def legacy_uuid(msg=None, default=False):
+    # uuid() before the fast path
+    def f(value, context=None):
+        try:
+            v = str(UUID(str(value)))
+        except ValueError:
+            if default and not value:
+                return uuid1()
+            else:
+                raise Invalid(_msg(msg, "uuid", "invalid uuid"))
+        return v
+
+    return f
+
+
+IDS = [uuid_module.uuid4() for i in range(1000)]
+
+INPUTS = [
+    ('canonical', [str(i) for i in IDS]),
+    ('upper case', [str(i).upper() for i in IDS]),
+    ('braced', ['{%s}' % i for i in IDS]),
+    ('16 bytes', [i.bytes for i in IDS]),
+]
+
+
+def run(label, go, number=200):
+    t = timeit.timeit(go, number=number)
+    print("%-30s %8.3f us/id" % (label, t / number / len(IDS) * 1e6))
+
+
+def main():
+    legacy, fast, batch = legacy_uuid(), V.uuid(), V.uuids()
+    for kind, values in INPUTS:
+        if kind != '16 bytes':
+            run("legacy, %s" % kind, lambda: [legacy(v) for v in values])
+        run("uuid(), %s" % kind, lambda: [fast(v) for v in values])
+        run("uuids(), %s" % kind, functools.partial(batch, values))
+
+
+if __name__ == '__main__':
+    main()
@@ -35,7 +35,15 @@ various subvalidators.  For instance:
 """
 
 from validino.base import *
+from validino.binary import *
+from validino.domains import *
 from validino.extra import *
 from validino.field import *
+from validino.messages import *
+from validino.registry import *
+from validino.report import *
+from validino.sampling import *
+from validino.session import *
+from validino.shared import *
 
 __version__ = '0.3'
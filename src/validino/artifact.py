@@ -0,0 +1,221 @@
+# -*- coding: utf-8 -*-
+"""
+Saving built validators to disk, so that worker processes can load
+them instead of building them again at import time.
+
+>>> import validino as V
+>>> from validino import artifact
+>>> schema = V.Schema(dict(name=(V.strip, V.not_empty())))
+>>> artifact.save(schema, '/tmp/schemas.vart', version='2')
+>>> schema = artifact.load('/tmp/schemas.vart', version='2')
+
+An artifact may hold any picklable object -- a single Schema, or a
+dict of them.  The validator closures themselves are stored as their
+compiled code objects plus the values they close over, so loading
+does not call the factories again.  Compiled regular expressions
+can only be stored by pattern and flags, so on load they are
+replaced with proxies that compile on first use; each worker then
+pays only for the patterns it actually uses.
+
+Every artifact records the artifact format, the validino version,
+the Python bytecode version and an optional version token supplied
+by the application; load() rejects an artifact if any of these
+differ.  Artifacts are pickles: only load files you wrote yourself.
+"""
+
+import io
+import marshal
+import os
+import pickle
+import re
+import sys
+import tempfile
+import types
+
+import validino
+from validino import base
+
+__all__ = ['StaleArtifact', 'dumps', 'loads', 'save', 'load']
+
+FORMAT = 2
+
+
+class StaleArtifact(ValueError):
+    """raised when an artifact was written by a different build"""
+
+
+class _LazyPattern(object):
+    """
+    stands in for a compiled regular expression, compiling it the
+    first time one of its methods is used.
+    """
+
+    def __init__(self, pattern, flags):
+        self.pattern = pattern
+        self.flags = flags
+
+    def __getattr__(self, name):
+        value = getattr(re.compile(self.pattern, self.flags), name)
+        # later lookups find the attribute without coming back here
+        setattr(self, name, value)
+        return value
+
+    def __reduce__(self):
+        return _LazyPattern, (self.pattern, self.flags)
+
+
+def _header(version):
+    return dict(
+        format=FORMAT,
+        validino=validino.__version__,
+        python=sys.implementation.cache_tag,
+        version=version,
+    )
+
+
+def _importable(f):
+    """
+    true if pickle can save the function by reference.
+    """
+    module = sys.modules.get(f.__module__)
+    obj = module
+    try:
+        for name in f.__qualname__.split('.'):
+            obj = getattr(obj, name)
+    except AttributeError:
+        return False
+    return obj is f
+
+
+def _make_function(code, module, ncells):
+    __import__(module)
+    closure = tuple(types.CellType() for i in range(ncells)) or None
+    return types.FunctionType(
+        code, sys.modules[module].__dict__, code.co_name, None, closure
+    )
+
+
+def _set_function_state(f, state):
+    cells, name, qualname, doc, defaults, kwdefaults, attrs, marks = state
+    for cell, value in zip(f.__closure__ or (), cells):
+        # empty cells are saved as empty tuples
+        if value:
+            cell.cell_contents = value[0]
+    f.__name__ = name
+    f.__qualname__ = qualname
+    f.__doc__ = doc
+    f.__defaults__ = defaults
+    f.__kwdefaults__ = kwdefaults
+    f.__dict__.update(attrs)
+    pure, walk = marks
+    if pure:
+        base._pure(f)
+    if walk is not None:
+        base._walk_frames[f] = walk
+
+
+def _cell_contents(cell):
+    try:
+        return (cell.cell_contents,)
+    except ValueError:
+        return ()
+
+
+class _Pickler(pickle.Pickler):
+
+    def reducer_override(self, obj):
+        if isinstance(obj, re.Pattern):
+            return _LazyPattern, (obj.pattern, obj.flags)
+        if isinstance(obj, types.CodeType):
+            return marshal.loads, (marshal.dumps(obj),)
+        if isinstance(obj, types.FunctionType) and not _importable(obj):
+            closure = obj.__closure__ or ()
+            state = (
+                [_cell_contents(c) for c in closure],
+                obj.__name__,
+                obj.__qualname__,
+                obj.__doc__,
+                obj.__defaults__,
+                obj.__kwdefaults__,
+                obj.__dict__,
+                # marks kept by identity, which the copy must be given
+                (base._is_pure(obj), base._walk_frame(obj)),
+            )
+            return (
+                _make_function,
+                (obj.__code__, obj.__module__, len(closure)),
+                state,
+                None,
+                None,
+                _set_function_state,
+            )
+        return NotImplemented
+
+
+def _plan(obj):
+    """
+    builds the plans of the Schemas in obj, which may be a Schema or
+    a dict, list or tuple of them (nested to any depth), so that they
+    are saved with the artifact.
+    """
+    stack = [obj]
+    while stack:
+        obj = stack.pop()
+        if isinstance(obj, validino.Schema):
+            obj._stages()
+        elif isinstance(obj, dict):
+            stack.extend(obj.values())
+        elif isinstance(obj, (list, tuple)):
+            stack.extend(obj)
+
+
+def dumps(obj, version=None):
+    """
+    serializes obj, which may contain validators built from closures
+    and lambdas, to an artifact string of bytes.  obj may be a single
+    Schema or validator, or a dict, list or tuple of them.
+    """
+    _plan(obj)
+    out = io.BytesIO()
+    pickle.dump(_header(version), out, pickle.HIGHEST_PROTOCOL)
+    _Pickler(out, pickle.HIGHEST_PROTOCOL).dump(obj)
+    return out.getvalue()
+
+
+def loads(data, version=None):
+    """
+    the inverse of dumps(); raises StaleArtifact if the artifact was
+    not written by this build with the same version.
+    """
+    f = io.BytesIO(data)
+    header = pickle.load(f)
+    expected = _header(version)
+    if header != expected:
+        raise StaleArtifact(
+            "artifact built for %r, expected %r" % (header, expected)
+        )
+    return pickle.load(f)
+
+
+def save(obj, path, version=None):
+    """
+    writes an artifact to path.  The file is replaced atomically, so
+    workers never see a partially written artifact.
+    """
+    data = dumps(obj, version)
+    fd, tmp = tempfile.mkstemp(dir=os.path.dirname(os.path.abspath(path)))
+    try:
+        with os.fdopen(fd, 'wb') as f:
+            f.write(data)
+        os.replace(tmp, path)
+    except BaseException:
+        os.unlink(tmp)
+        raise
+
+
+def load(path, version=None):
+    """
+    reads an artifact written by save().
+    """
+    with open(path, 'rb') as f:
+        return loads(f.read(), version)
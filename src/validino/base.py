@@ -5,10 +5,18 @@ import re
 import time
 from uuid import UUID, uuid1
 import types
+import urllib.parse
+import weakref
+import contextvars
 import copy
 import functools
+import itertools
+import json
+import json.decoder
+import json.scanner
 
 from validino import util
+from validino.messages import _active as _active_messages
 
 __all__ = [
     'Invalid', 'check', 'clamp', 'clamp_length', 'confirm_type', 'default',
@@ -18,11 +26,17 @@ __all__ = [
     'not_empty', 'not_belongs', 'belongs', 'parse_date', 'parse_datetime',
     'parse_time', 'regex', 'regex_sub', 'Schema', 'strip', 'to_list',
     'to_scalar', 'is_string', 'to_string', 'is_bytes', 'to_bytes',
-    'translate', 'nested', 'nested_many', 'only_one_of'
+    'translate', 'nested', 'nested_many', 'only_one_of', 'blocking',
+    'limit_depth', 'stream_many', 'stream_list', 'guard', 'regex_any',
+    'uuids', 'dispatch_on_type', 'union', 'recursive'
 ]
 
 _default = object()
 
+_immutable_types = frozenset(
+    (str, bytes, int, float, complex, bool, type(None), tuple, frozenset)
+)
+
 
 def _add_error_message(d, k, msg):
     """
@@ -36,15 +50,125 @@ def _add_error_message(d, k, msg):
 
 def _msg(msg, key, default):
     """
-    internal message-handling routine.
+    internal message-handling routine.  An explicit message, or a
+    dictionary of messages containing the key, takes precedence over
+    the active message catalog (see validino.messages), which takes
+    precedence over the default.
     """
-    try:
-        return msg.get(key, default)
-    except AttributeError:
-        if msg is None:
-            return default
-        else:
+    if msg is not None:
+        if isinstance(msg, str):
+            return msg
+        try:
+            text = msg.get(key, _default)
+        except AttributeError:
             return msg
+        if text is not _default:
+            return text
+    table = _active_messages.get()
+    if table is None:
+        return default
+    return table.get(key, default)
+
+
+# the validators marked by _pure().  The marks are kept off the
+# functions, as functools.wraps() copies a function's attributes to
+# any wrapper of it, which may well mutate its input.
+_pure_validators = weakref.WeakSet()
+
+
+def _pure(f):
+    """
+    marks a validator as one that never mutates the value it is
+    passed, so that excursion() can skip its defensive copy.
+    """
+    _pure_validators.add(f)
+    return f
+
+
+def _is_pure(validator):
+    """
+    true if the validator itself was marked by _pure().
+    """
+    try:
+        return validator in _pure_validators
+    except TypeError:
+        return False
+
+
+# the frames that _walk() applies the validators built by nested(),
+# nested_many(), all_of() and recursive() with, kept off the
+# functions for the same reason as the marks of _pure()
+_walk_frames = weakref.WeakKeyDictionary()
+
+
+def _walk_frame(validator):
+    try:
+        return _walk_frames.get(validator)
+    except TypeError:
+        return None
+
+
+# validators built by _interned factories, by factory and arguments
+_interned_validators = weakref.WeakValueDictionary()
+
+
+def _argument_key(value):
+    # 1, 1.0 and True are equal but may not validate alike, wherever
+    # they are in the arguments
+    if isinstance(value, tuple):
+        return (value.__class__, tuple(_argument_key(v) for v in value))
+    if isinstance(value, frozenset):
+        return (value.__class__, frozenset(_argument_key(v) for v in value))
+    return (value.__class__, value)
+
+
+def _interned(factory):
+    """
+    makes a factory of stateless validators return the same validator
+    for the same arguments for as long as it is in use, so that the
+    many copies of validators like not_empty() or clamp_length(max=255)
+    in a large set of schemas share one object.  Calls with arguments
+    that can't be hashed (a dict of messages, a list domain) build a
+    new validator as before.  Interned validators are shared, so they
+    must not be given attributes of their own after they are built.
+    Only factories whose validators use their arguments through ==
+    may be interned: default() returns its argument itself, and
+    Decimal('1.00') or -0.0 would come back as whichever equal value
+    was interned first.
+    """
+
+    @functools.wraps(factory)
+    def intern(*args, **kwargs):
+        key = (
+            factory,
+            tuple(_argument_key(a) for a in args),
+            tuple((k, _argument_key(v)) for k, v in kwargs.items()),
+        )
+        try:
+            return _interned_validators[key]
+        except KeyError:
+            pass
+        except TypeError:
+            return factory(*args, **kwargs)
+        f = factory(*args, **kwargs)
+        _interned_validators[key] = f
+        return f
+
+    return intern
+
+
+def _all_pure(validators):
+    """
+    true if none of the validators will mutate their input.
+    """
+    return all(_is_pure(v) for v in validators)
+
+
+def _any_blocking(validators):
+    """
+    true if any of the validators is marked as blocking.
+    """
+    return any(getattr(v, 'blocking', False) for v in validators)
 
 
 def dict_nest(data, separator='.'):
@@ -83,6 +207,54 @@ def dict_unnest(data, separator='.'):
     return res
 
 
+def _collapse(result):
+    keys = list(result.keys())
+
+    if keys == [None]:
+        return result[None]
+    elif keys == ['']:
+        return result['']
+    else:
+        return result
+
+
+def _unpack_error(name, error):
+    """
+    flattens an error -- a message, a list whose first item is an
+    error, a dictionary of errors, or an Invalid -- into a (name,
+    result) pair of plain messages and dictionaries.  Nested errors
+    are walked with an explicit stack rather than by recursion, so
+    that errors from deeply nested documents can be unpacked.
+    """
+    # frames are (name, iterator over items, result, collapse?)
+    stack = []
+    while True:
+        while isinstance(error, (list, tuple)):
+            error = error[0]
+        if isinstance(error, Invalid):
+            name = getattr(error, 'field', name)
+            stack.append((name, iter(error.errors.items()), {}, True))
+        elif isinstance(error, dict):
+            stack.append((name, iter(error.items()), {}, False))
+        else:
+            if not stack:
+                return name, error
+            stack[-1][2][name] = error
+        while True:
+            frame = stack[-1]
+            try:
+                name, error = next(frame[1])
+            except StopIteration:
+                stack.pop()
+                name = frame[0]
+                result = _collapse(frame[2]) if frame[3] else frame[2]
+                if not stack:
+                    return name, result
+                stack[-1][2][name] = result
+            else:
+                break
+
+
 class Invalid(Exception):
     """A general Exception for things that are Invalid"""
 
@@ -97,34 +269,10 @@ class Invalid(Exception):
         self.errors = errors
 
     def _unpack_error(self, name, error):
-        if isinstance(error, dict):
-            result = dict([
-                self._unpack_error(key, value)
-                for (key, value) in error.items()
-            ])
-        elif isinstance(error, (list, tuple)):
-            name, result = self._unpack_error(name, error[0])
-        elif isinstance(error, Invalid):
-            name = getattr(error, 'field', name)
-            result = error._unpack_errors()
-        else:
-            result = error
-        return (name, result)
+        return _unpack_error(name, error)
 
     def _unpack_errors(self):
-        result = dict()
-        for key, value in self.errors.items():
-            name, error = self._unpack_error(key, value)
-            result[name] = error
-
-        keys = list(result.keys())
-
-        if keys == [None]:
-            return result[None]
-        elif keys == ['']:
-            return result['']
-        else:
-            return result
+        return _unpack_error(None, self)[1]
 
     def unpack_errors(self):
         result = self._unpack_errors()
@@ -134,6 +282,198 @@ class Invalid(Exception):
             return result
 
 
+class _Limits(object):
+    """
+    running totals for the limits of guard() and Schema, so that
+    input can be checked a piece at a time as it is parsed.
+    """
+
+    def __init__(
+        self, max_keys=None, max_bytes=None, max_depth=None,
+        max_items=None, msg=None
+    ):
+        self.max_keys = max_keys
+        self.max_bytes = max_bytes
+        self.max_depth = max_depth
+        self.max_items = max_items
+        self.msg = msg
+        self.keys = 0
+        self.size = 0
+
+    def add_string(self, value):
+        max_bytes = self.max_bytes
+        if max_bytes is not None:
+            n = len(value)
+            if isinstance(value, str) and not value.isascii() and (
+                self.size + n <= max_bytes
+            ):
+                n = len(value.encode('utf8', 'surrogatepass'))
+            self.size += n
+            if self.size > max_bytes:
+                raise Invalid(_msg(self.msg, 'max_bytes', 'too much data'))
+
+    def add_keys(self, n):
+        if self.max_keys is not None:
+            self.keys += n
+            if self.keys > self.max_keys:
+                raise Invalid(_msg(self.msg, 'max_keys', 'too many keys'))
+
+    def check_items(self, n):
+        if self.max_items is not None and n > self.max_items:
+            raise Invalid(_msg(self.msg, 'max_items', 'too many items'))
+
+    def check_depth(self, depth):
+        if self.max_depth is not None and depth > self.max_depth:
+            raise Invalid(_msg(self.msg, 'max_depth', 'too deeply nested'))
+
+    def walk(self, data, depth=1):
+        """
+        adds a value found at the given depth, and everything in it.
+        Containers are walked an item at a time, so that a wide one
+        stops the walk as soon as a limit is exceeded.
+        """
+        stack = [(iter((data,)), depth)]
+        while stack:
+            items, depth = stack[-1]
+            value = next(items, _default)
+            if value is _default:
+                stack.pop()
+                continue
+            if isinstance(value, (str, bytes, bytearray)):
+                self.add_string(value)
+                continue
+            if isinstance(value, dict):
+                self.add_keys(len(value))
+                children = itertools.chain.from_iterable(value.items())
+            elif isinstance(value, (list, tuple)):
+                self.check_items(len(value))
+                children = iter(value)
+            else:
+                continue
+            self.check_depth(depth)
+            stack.append((children, depth + 1))
+
+
+def _check_limits(
+    data, max_keys=None, max_bytes=None, max_depth=None, max_items=None,
+    msg=None
+):
+    """
+    walks data once, raising Invalid as soon as any of the limits is
+    exceeded.
+    """
+    _Limits(max_keys, max_bytes, max_depth, max_items, msg).walk(data)
+
+
+_json_ws = re.compile(r'[ \t\n\r]*')
+
+_json_literals = ('true', 'false', 'null', 'NaN', 'Infinity', '-Infinity')
+
+_json_closing = {'{': '}', '[': ']'}
+
+_json_decoder = json.JSONDecoder()
+
+
+def _json_key(s, idx, limits, seen):
+    """
+    reads an object key and the colon after it, returning the key
+    and the index of the value that follows.  seen is the set of the
+    keys of the object read so far; a repeated key raises ValueError,
+    as json.loads() would keep only its last value, which counts for
+    less than the limits have been charged.
+    """
+    if s[idx:idx + 1] != '"':
+        raise ValueError("expected a key at %d" % idx)
+    key, idx = json.decoder.scanstring(s, idx + 1)
+    if key in seen:
+        raise ValueError("repeated key %r" % key)
+    seen.add(key)
+    limits.add_string(key)
+    limits.add_keys(1)
+    idx = _json_ws.match(s, idx).end()
+    if s[idx:idx + 1] != ':':
+        raise ValueError("expected ':' at %d" % idx)
+    return key, _json_ws.match(s, idx + 1).end()
+
+
+def _skip_json(s, idx, depth, limits):
+    """
+    checks the JSON value at s[idx] at the given depth against the
+    limits without building it, returning the index after it.  Raises
+    ValueError if the JSON is malformed.
+    """
+    # the open containers: their opening brackets, lengths so far,
+    # and for objects, the keys read so far
+    stack = []
+    while True:
+        c = s[idx:idx + 1]
+        if c in _json_closing:
+            limits.check_depth(depth + len(stack))
+            idx = _json_ws.match(s, idx + 1).end()
+            if s[idx:idx + 1] == _json_closing[c]:
+                idx += 1
+            else:
+                stack.append([c, 1, set() if c == '{' else None])
+                if c == '{':
+                    key, idx = _json_key(s, idx, limits, stack[-1][2])
+                else:
+                    limits.check_items(1)
+                continue
+        elif c == '"':
+            value, idx = json.decoder.scanstring(s, idx + 1)
+            limits.add_string(value)
+        else:
+            m = json.scanner.NUMBER_RE.match(s, idx)
+            if m is not None:
+                idx = m.end()
+            else:
+                for literal in _json_literals:
+                    if s.startswith(literal, idx):
+                        idx += len(literal)
+                        break
+                else:
+                    raise ValueError("expected a value at %d" % idx)
+        # a value has ended; close the containers it ends
+        while stack:
+            idx = _json_ws.match(s, idx).end()
+            c = s[idx:idx + 1]
+            top = stack[-1]
+            if c == ',':
+                idx = _json_ws.match(s, idx + 1).end()
+                if top[0] == '{':
+                    key, idx = _json_key(s, idx, limits, top[2])
+                else:
+                    top[1] += 1
+                    limits.check_items(top[1])
+                break
+            if c != _json_closing[top[0]]:
+                raise ValueError("expected ',' at %d" % idx)
+            stack.pop()
+            idx += 1
+        else:
+            return idx
+
+
+@_interned
+def guard(
+    max_keys=None, max_bytes=None, max_depth=None, max_items=None, msg=None
+):
+    """
+    rejects oversized input before it reaches other validators.  In a
+    single pass over the value, checks the total number of keys in
+    all its dictionaries, the total length in bytes of its strings
+    (including keys, measured as UTF-8), how deeply its dictionaries
+    and lists are nested, and the length of each list.
+    """
+
+    @functools.wraps(guard)
+    def f(value, context=None):
+        _check_limits(value, max_keys, max_bytes, max_depth, max_items, msg)
+        return value
+
+    return _pure(f)
+
+
 class Schema(object):
     """
     creates a validator from a dictionary of subvalidators that will
@@ -155,13 +495,37 @@ class Schema(object):
     key)).  In either case, the return value of the subvalidator
     should match the structure of the input.
 
-    The subvalidators are sorted by key before being executed.  Therefore,
-    subvalidators with plural keys will always be executed after those
-    with singular keys.
+    The subvalidators are scheduled according to the fields they
+    read: those with singular keys run first, and those with plural
+    keys run after them, each one after any earlier plural key it
+    shares a field with.  Plural keys that share no fields are
+    independent of each other.
+
+    If an executor (e.g. a concurrent.futures.ThreadPoolExecutor) is
+    given, independent subvalidators marked as blocking -- see
+    blocking() -- are submitted to it and run concurrently with the
+    rest.  The result and errors are merged stage by stage, and in
+    declaration order within a stage, so they do not depend on which
+    subvalidator finishes first.
 
     If allow_missing is False, then any missing keys in the input will
     give rise to an error.  Similarly, if allow_extra is False, any
     extra keys will result in an error.
+
+    If messages is a Catalog, error messages are taken from the table
+    for the locale named by the 'locale' key of the context.
+
+    max_keys, max_bytes, max_depth and max_items limit the size and
+    shape of the input, as for guard(); oversized input is rejected
+    before any subvalidator runs.
+
+    validate_query() and validate_pairs() take a query string or a
+    sequence of (key, value) pairs, as submitted by an HTML form,
+    instead of a dictionary.  Fields named in list_fields receive a
+    list of all the values given for them (an empty list if none
+    are, unless filter_missing is true), and other fields the first
+    value, so the subvalidators need no to_scalar() or to_list() of
+    their own.
     """
 
     def __init__(
@@ -172,6 +536,13 @@ class Schema(object):
         allow_extra=True,
         filter_extra=True,
         filter_missing=False,
+        executor=None,
+        messages=None,
+        max_keys=None,
+        max_bytes=None,
+        max_depth=None,
+        max_items=None,
+        list_fields=(),
     ):
         self.subvalidators = subvalidators
         self.msg = msg
@@ -179,6 +550,56 @@ class Schema(object):
         self.allow_extra = allow_extra
         self.filter_extra = filter_extra
         self.filter_missing = filter_missing
+        self.executor = executor
+        self.messages = messages
+        self.limits = dict(
+            max_keys=max_keys,
+            max_bytes=max_bytes,
+            max_depth=max_depth,
+            max_items=max_items,
+        )
+        self.list_fields = frozenset(list_fields)
+        self._plan = None
+
+    def __getstate__(self):
+        # executors can't be pickled; reattach one after loading
+        state = self.__dict__.copy()
+        state['executor'] = None
+        return state
+
+    def _stages(self):
+        """
+        returns the subvalidator keys grouped into stages; the keys
+        within a stage read disjoint fields and may run in any order,
+        but every stage must finish before the next one starts.
+        """
+        items = tuple(self.subvalidators.items())
+        if self._plan is not None and self._plan[0] == items:
+            return self._plan[1]
+        validators = {}
+        singular = []
+        plural = []
+        levels = []
+        for k, vfunc in items:
+            if isinstance(vfunc, (list, tuple)):
+                vfunc = all_of(*vfunc)
+            validators[k] = vfunc
+            if not isinstance(k, (list, tuple)):
+                singular.append(k)
+                continue
+            fields = set(k)
+            level = 0
+            for k1, level1 in zip(plural, levels):
+                if level1 >= level and fields.intersection(k1):
+                    level = level1 + 1
+            plural.append(k)
+            levels.append(level)
+        stages = [singular] if singular else []
+        for level in range(max(levels) + 1 if levels else 0):
+            stages.append([k for k, l in zip(plural, levels) if l == level])
+        self._validators = validators
+        self._plan = (items, stages)
+        return stages
 
     def _keys(self):
         schemakeys = set()
@@ -190,14 +611,14 @@ class Schema(object):
                 schemakeys.add(x)
         return schemakeys
 
-    def __call__(self, data, context=None):
-        if not context:
-            context = dict()
-        if not self.filter_extra:
-            result = data
-        else:
-            result = {}
-        exceptions = {}
+    def _check_keys(self, data, limits=True):
+        """
+        raises Invalid if the input is larger than the schema's limits
+        allow, or has extra or missing keys that the schema does not
+        allow.
+        """
+        if limits and any(x is not None for x in self.limits.values()):
+            _check_limits(data, msg=self.msg, **self.limits)
         if not (self.allow_extra and self.allow_missing):
             inputkeys = set(data.keys())
             schemakeys = self._keys()
@@ -212,32 +633,58 @@ class Schema(object):
                     )
                     raise Invalid(m)
 
-        for k in self.subvalidators:
-            if not k in data:
-                if self.filter_missing:
-                    continue
-            vfunc = self.subvalidators[k]
-            if isinstance(vfunc, (list, tuple)):
-                vfunc = all_of(*vfunc)
-            have_plural = isinstance(k, (list, tuple))
-            if have_plural:
-                vdata = tuple(result.get(x, data.get(x)) for x in k)
-            else:
-                vdata = result.get(k, data.get(k))
-            try:
-                tmp = vfunc(vdata, context)
-            except Invalid as e:
-                # if the exception specifies a field name,
-                # let that override the key in the validator
-                # dictionary
-                name = getattr(e, 'field', k)
-                exceptions[name] = e._unpack_errors()
+    def _validate_key(self, k, data, result, context):
+        """
+        runs the subvalidator for the key k.  Returns a pair of
+        (values, error): values is a dictionary of the converted
+        values to be merged into the result, and error is a (name,
+        errors) pair if the subvalidator failed.
+        """
+        vfunc = self._validators[k]
+        have_plural = isinstance(k, (list, tuple))
+        if have_plural:
+            vdata = tuple(result.get(x, data.get(x)) for x in k)
+        else:
+            vdata = result.get(k, data.get(k))
+        try:
+            tmp = vfunc(vdata, context)
+        except Invalid as e:
+            # if the exception specifies a field name,
+            # let that override the key in the validator
+            # dictionary
+            name = getattr(e, 'field', k)
+            return None, (name, e._unpack_errors())
+        if have_plural:
+            return dict(zip(k, tmp)), None
+        return {k: tmp}, None
+
+    def _run_stage(self, keys, data, result, context):
+        """
+        validates the keys of a single stage, returning a list of
+        their outcomes (see _validate_key) in the same order.
+        """
+        if self.executor is None or len(keys) < 2:
+            return [
+                self._validate_key(k, data, result, context) for k in keys
+            ]
+        futures = {}
+        for i, k in enumerate(keys):
+            if getattr(self._validators[k], 'blocking', False):
+                # run in a copy of our context so that the active
+                # message catalog carries over to the worker thread
+                futures[i] = self.executor.submit(
+                    contextvars.copy_context().run,
+                    self._validate_key, k, data, result, context
+                )
+        outcomes = []
+        for i, k in enumerate(keys):
+            if i in futures:
+                outcomes.append(futures[i].result())
             else:
-                if have_plural:
-                    result.update(dict(zip(k, tmp)))
-                else:
-                    result[k] = tmp
+                outcomes.append(self._validate_key(k, data, result, context))
+        return outcomes
 
+    def _finish(self, result, exceptions):
         if exceptions:
             if None not in exceptions:
                 m = _msg(
@@ -248,7 +695,187 @@ class Schema(object):
             raise Invalid(exceptions)
         return result
 
+    def __call__(self, data, context=None):
+        if not context:
+            context = dict()
+        if self.messages is None:
+            return self._validate(data, context)
+        with self.messages.for_context(context):
+            return self._validate(data, context)
+
+    def _gather(self, pairs, convert=None):
+        """
+        builds the input dictionary from (key, value) pairs, applying
+        list_fields, and converting the values that are kept with
+        convert.  Keys that would be filtered out are skipped without
+        converting their values.
+        """
+        data = {}
+        list_fields = self.list_fields
+        if self.filter_extra and self.allow_extra:
+            wanted = self._keys()
+        else:
+            wanted = None
+        for k, v in pairs:
+            if wanted is not None and k not in wanted:
+                continue
+            if k in list_fields:
+                if convert is not None:
+                    v = convert(v)
+                try:
+                    data[k].append(v)
+                except KeyError:
+                    data[k] = [v]
+            elif k not in data:
+                data[k] = v if convert is None else convert(v)
+        if not self.filter_missing:
+            # a form sends nothing at all for a list field given no
+            # values, such as a group of unticked checkboxes
+            for k in list_fields:
+                if k not in data and (wanted is None or k in wanted):
+                    data[k] = []
+        return data
+
+    def validate_pairs(self, pairs, context=None):
+        """
+        validates an iterable of (key, value) pairs, such as
+        urllib.parse.parse_qsl() returns.
+        """
+        return self(self._gather(pairs), context)
+
+    def validate_query(
+        self, qs, context=None, keep_blank_values=False, encoding='utf-8',
+        errors='replace', separator='&'
+    ):
+        """
+        validates a query string, parsed as urllib.parse.parse_qsl()
+        parses it.
+        """
+        if isinstance(qs, (bytes, bytearray)):
+            qs = qs.decode('ascii')
+
+        def unquote(s):
+            return urllib.parse.unquote(
+                s.replace('+', ' '), encoding=encoding, errors=errors
+            )
+
+        def pairs():
+            for field in qs.split(separator):
+                if not field:
+                    continue
+                name, eq, value = field.partition('=')
+                if not eq and not keep_blank_values:
+                    continue
+                if value or keep_blank_values:
+                    yield unquote(name), value
+
+        return self(self._gather(pairs(), unquote), context)
+
+    def validate_json(self, body, context=None):
+        """
+        parses a JSON document (str or bytes) and validates it, with
+        the same result as self(json.loads(body)), but checking the
+        input while parsing it: the limits are enforced as each member
+        of the top-level object is read, and a disallowed extra key
+        stops parsing at once.  The values of keys that would be
+        filtered out are never kept; if the schema has limits, they
+        are scanned without being built at all, so that oversized
+        input is rejected as soon as a limit is exceeded.  A document
+        that repeats a key is read with json.loads() once the repeat
+        is found, so that only the last value counts.
+        """
+        if not context:
+            context = dict()
+        if self.messages is None:
+            return self._validate_json(body, context)
+        with self.messages.for_context(context):
+            return self._validate_json(body, context)
+
+    def _validate_json(self, body, context):
+        try:
+            data = self._parse_json(body)
+        except ValueError:
+            # not an object, malformed, or with a repeated key: let
+            # json report it, or read it as it does
+            return self._validate(json.loads(body), context)
+        return self._validate(data, context, limits=False)
+
+    def _parse_json(self, body):
+        """
+        parses a JSON object, checking it against the limits and the
+        allowed keys as it goes.  Raises ValueError for anything else.
+        """
+        if isinstance(body, (bytes, bytearray)):
+            body = body.decode(json.detect_encoding(body), 'surrogatepass')
+        limits = _Limits(msg=self.msg, **self.limits)
+        limited = any(x is not None for x in self.limits.values())
+        schemakeys = self._keys()
+        skip_extra = self.filter_extra and self.allow_extra
+        decoder = _json_decoder
+        data = {}
+        seen = set()
+        idx = _json_ws.match(body).end()
+        if body[idx:idx + 1] != '{':
+            raise ValueError("not an object")
+        limits.check_depth(1)
+        idx = _json_ws.match(body, idx + 1).end()
+        if body[idx:idx + 1] != '}':
+            while True:
+                key, idx = _json_key(body, idx, limits, seen)
+                if key not in schemakeys and skip_extra:
+                    if limited:
+                        idx = _skip_json(body, idx, 2, limits)
+                    else:
+                        # the C decoder checks a value faster than any
+                        # Python scanner; the value is dropped at once
+                        idx = decoder.raw_decode(body, idx)[1]
+                elif key not in schemakeys and not self.allow_extra:
+                    m = _msg(self.msg, 'schema.extra', 'extra keys in input')
+                    raise Invalid(m)
+                else:
+                    if limited:
+                        # checked in the raw text first, so that a value
+                        # breaking the limits is never built
+                        _skip_json(body, idx, 2, limits)
+                    value, idx = decoder.raw_decode(body, idx)
+                    data[key] = value
+                idx = _json_ws.match(body, idx).end()
+                c = body[idx:idx + 1]
+                idx = _json_ws.match(body, idx + 1).end()
+                if c == '}':
+                    break
+                if c != ',':
+                    raise ValueError("expected ',' or '}'")
+        else:
+            idx = _json_ws.match(body, idx + 1).end()
+        if idx != len(body):
+            raise ValueError("extra data")
+        return data
+
+    def _validate(self, data, context, limits=True):
+        if not self.filter_extra:
+            result = data
+        else:
+            result = {}
+        exceptions = {}
+        self._check_keys(data, limits)
+
+        for stage in self._stages():
+            if self.filter_missing:
+                stage = [k for k in stage if k in data]
+            for values, error in self._run_stage(
+                stage, data, result, context
+            ):
+                if error:
+                    name, errors = error
+                    exceptions[name] = errors
+                else:
+                    result.update(values)
 
+        return self._finish(result, exceptions)
+
+
+@_interned
 def confirm_type(typespec, msg=None):
     @functools.wraps(confirm_type)
     def f(value, context=None):
@@ -256,9 +883,96 @@ def confirm_type(typespec, msg=None):
             return value
         raise Invalid(_msg(msg, "confirm_type", "unexpected type"))
 
+    return _pure(f)
+
+
+def dispatch_on_type(mapping, default=None, msg=None):
+    """
+    Chooses a validator by the type of the value from a mapping of
+    types (or tuples of types) to validators, and returns its result.
+    A type not in the mapping is matched by its nearest base class
+    that is; types with no match go to the default validator, or if
+    there is none, are rejected as confirm_type() rejects them.
+    Tuples of validators are run in turn, as all_of() runs them.
+    """
+
+    table = {}
+    for types, v in mapping.items():
+        if isinstance(v, tuple):
+            v = all_of(*v)
+        if not isinstance(types, tuple):
+            types = (types,)
+        for t in types:
+            table.setdefault(t, v)
+    if isinstance(default, tuple):
+        default = all_of(*default)
+    # the validator for each type seen so far, found through its MRO
+    cache = table.copy()
+
+    def resolve(cls):
+        for base in cls.__mro__:
+            if base in table:
+                v = table[base]
+                break
+        else:
+            v = default
+        cache[cls] = v
+        return v
+
+    @functools.wraps(dispatch_on_type)
+    def f(value, context=None):
+        cls = value.__class__
+        try:
+            v = cache[cls]
+        except KeyError:
+            v = resolve(cls)
+        if v is None:
+            raise Invalid(_msg(msg, "confirm_type", "unexpected type"))
+        return v(value, context=context)
+
+    validators = list(table.values())
+    if default is not None:
+        validators.append(default)
+    if _all_pure(validators):
+        _pure(f)
+    f.blocking = _any_blocking(validators)
     return f
 
 
+def union(field, schemas, default=None, msg=None):
+    """
+    Validates a dict with one of several validators (usually
+    Schemas), chosen by the value of its field named field: schemas
+    maps each value of that field to the validator for it.  Only the
+    chosen validator is run, and its errors are raised unchanged.
+    Dicts with an unknown or missing value in the field go to the
+    default validator, or if there is none, are rejected with an
+    error for the field.
+    """
+
+    @functools.wraps(union)
+    def f(value, context=None):
+        try:
+            v = schemas[value[field]]
+        except (KeyError, TypeError, IndexError):
+            v = default
+        if v is None:
+            raise Invalid(
+                {field: _msg(msg, "union.unknown", "unknown type")}
+            )
+        return v(value, context=context)
+
+    validators = list(schemas.values())
+    if default is not None:
+        validators.append(default)
+    f.schemas = schemas
+    if _all_pure(validators):
+        _pure(f)
+    f.blocking = _any_blocking(validators)
+    return f
+
+
+@_interned
 def translate(mapping, msg=None):
     @functools.wraps(translate)
     def f(value, context=None):
@@ -267,9 +981,10 @@ def translate(mapping, msg=None):
         except KeyError:
             raise Invalid(_msg(msg, "belongs", "invalid choice"))
 
-    return f
+    return _pure(f)
 
 
+@_interned
 def is_string(msg=None):
     @functools.wraps(is_string)
     def f(value, context=None):
@@ -278,9 +993,10 @@ def is_string(msg=None):
         else:
             raise Invalid(_msg(msg, 'is_string', 'not string'))
 
-    return f
+    return _pure(f)
 
 
+@_interned
 def to_string(encoding='utf8', errors='strict', msg=None):
     @functools.wraps(to_string)
     def f(value, context=None):
@@ -296,9 +1012,10 @@ def to_string(encoding='utf8', errors='strict', msg=None):
             except UnicodeError as e:
                 raise Invalid(_msg(msg, 'to_unicode', 'encoding error'))
 
-    return f
+    return _pure(f)
 
 
+@_interned
 def is_bytes(msg=None):
     @functools.wraps(is_bytes)
     def f(value, context=None):
@@ -307,9 +1024,10 @@ def is_bytes(msg=None):
         else:
             raise Invalid(_msg(msg, 'is_bytes', 'not bytes'))
 
-    return f
+    return _pure(f)
 
 
+@_interned
 def to_bytes(encoding='utf8', errors='strict', coerce=True, msg=None):
     @functools.wraps(to_bytes)
     def f(value, context=None):
@@ -327,9 +1045,10 @@ def to_bytes(encoding='utf8', errors='strict', coerce=True, msg=None):
             except UnicodeError as e:
                 raise Invalid(_msg(msg, 'to_bytes', 'encoding error'))
 
-    return f
+    return _pure(f)
 
 
+@_interned
 def is_scalar(msg=None, listtypes=(list,)):
     """
     Raises an exception if the value is not a scalar.
@@ -341,9 +1060,10 @@ def is_scalar(msg=None, listtypes=(list,)):
             raise Invalid(_msg(msg, 'is_scalar', 'expected scalar value'))
         return value
 
-    return f
+    return _pure(f)
 
 
+@_interned
 def is_list(msg=None, listtypes=(list,)):
     """
     Raises an exception if the value is not a list.
@@ -355,9 +1075,10 @@ def is_list(msg=None, listtypes=(list,)):
             raise Invalid(_msg(msg, "is_list", "expected list value"))
         return value
 
-    return f
+    return _pure(f)
 
 
+@_interned
 def to_scalar(listtypes=(list,)):
     """
     if the value is a list, return the first element.
@@ -372,9 +1093,10 @@ def to_scalar(listtypes=(list,)):
             return value[0]
         return value
 
-    return f
+    return _pure(f)
 
 
+@_interned
 def to_list(listtypes=(list,)):
     """
     if the value is a scalar, wrap it in a list.
@@ -389,7 +1111,7 @@ def to_list(listtypes=(list,)):
             return [value]
         return value
 
-    return f
+    return _pure(f)
 
 
 def default(defaultValue):
@@ -405,9 +1127,10 @@ def default(defaultValue):
             return defaultValue
         return value
 
-    return f
+    return _pure(f)
 
 
+@_interned
 def all_of(*validators):
     """
     Applies each of a series of validators in turn, passing the return
@@ -420,16 +1143,36 @@ def all_of(*validators):
             value = v(value, context=context)
         return value
 
+    _walk_frames[f] = (_ChainFrame, validators, False)
+    if _all_pure(validators):
+        _pure(f)
+    f.blocking = _any_blocking(validators)
     return f
 
 
-def either(*validators):
+def either(*validators, adaptive=False, every=1000):
     """
     Tries each of a series of validators in turn, swallowing any
     exceptions they raise, and returns the result of the first one
     that works.  If none work, the last exception caught is re-raised.
+
+    If adaptive is true, the caller declares that the order of the
+    validators doesn't matter (no value is accepted by more than one
+    of them, or those that accept it agree), and they are reordered
+    every so many calls to try first the ones that have accepted the
+    most values.  The declaration is all or nothing: it covers every
+    one of the validators, and none of them is kept in place, so
+    validators whose order matters belong in a separate either()
+    nested inside this one.  If none work, the exception raised by
+    the last validator as declared is re-raised, whatever order they
+    were tried in, and if there are none at all, Invalid is raised.
+    f.stats() returns the number of calls, the current order, and the
+    number of tries and successes of each validator.
     """
 
+    if adaptive:
+        return _adaptive_either(validators, every)
+
     @functools.wraps(either)
     def f(value, context=None):
         last_exception = None
@@ -442,6 +1185,59 @@ def either(*validators):
                 return value
         raise last_exception
 
+    if _all_pure(validators):
+        _pure(f)
+    f.blocking = _any_blocking(validators)
+    return f
+
+
+def _adaptive_either(validators, every):
+    n = len(validators)
+    tries = [0] * n
+    successes = [0] * n
+    # the order, the number of calls left before it is revised, and
+    # the number of calls so far
+    state = [tuple(range(n)), every, 0]
+
+    def reorder():
+        state[0] = tuple(sorted(range(n), key=lambda i: -successes[i]))
+        state[1] = every
+
+    @functools.wraps(either)
+    def f(value, context=None):
+        errors = {}
+        for i in state[0]:
+            tries[i] += 1
+            try:
+                result = validators[i](value, context=context)
+            except Exception as e:
+                errors[i] = e
+            else:
+                successes[i] += 1
+                break
+        state[1] -= 1
+        state[2] += 1
+        if state[1] <= 0:
+            reorder()
+        if len(errors) == n:
+            if not n:
+                raise Invalid(_msg(None, 'either', 'no validator to try'))
+            raise errors[n - 1]
+        return result
+
+    def stats():
+        return dict(
+            calls=state[2],
+            order=list(state[0]),
+            branches=[
+                dict(tries=t, successes=s) for t, s in zip(tries, successes)
+            ],
+        )
+
+    f.stats = stats
+    if _all_pure(validators):
+        _pure(f)
+    f.blocking = _any_blocking(validators)
     return f
 
 
@@ -459,26 +1255,69 @@ def check(*validators):
             v(value, context=context)
         return value
 
+    if _all_pure(validators):
+        _pure(f)
+    f.blocking = _any_blocking(validators)
     return f
 
 
-def excursion(*validators):
+def excursion(*validators, mode='auto'):
     """
     Perform a series of validations that may break down the data
     passed in into a form that you don't deserve to retain; if the
     data survives validation, you get a copy of the data from the
     point the excursion started.
-    """
+
+    The mode determines how that copy is taken:
+
+      'auto'    -- no copy is made when the value is immutable or
+                   every validator is marked pure (see _pure());
+                   otherwise a shallow copy is made.
+      'shallow' -- always take a shallow copy.
+      'deep'    -- always take a deep copy, for validators that may
+                   mutate objects nested inside the value.
+    """
+    if mode not in ('auto', 'shallow', 'deep'):
+        raise ValueError("unknown excursion mode: %r" % (mode,))
+    run = all_of(*validators)
+    if mode == 'deep':
+        snapshot = copy.deepcopy
+    elif mode == 'auto' and _is_pure(run):
+        snapshot = None
+    else:
+        snapshot = copy.copy
 
     @functools.wraps(excursion)
     def f(value, context=None):
-        return_value = copy.copy(value)
-        all_of(*validators)(value)
+        if snapshot is None or type(value) in _immutable_types:
+            run(value)
+            return value
+        return_value = snapshot(value)
+        run(value)
         return return_value
 
+    if _is_pure(run):
+        _pure(f)
+    f.blocking = run.blocking
+    return f
+
+
+def blocking(validator):
+    """
+    marks a validator as one that spends its time waiting on I/O
+    (a database lookup, an http request), so that a Schema with an
+    executor can run it concurrently with its other subvalidators.
+    """
+
+    @functools.wraps(validator)
+    def f(value, context=None):
+        return validator(value, context)
+
+    f.blocking = True
     return f
 
 
+@_interned
 def equal(val, msg=None):
     @functools.wraps(equal)
     def f(value, context=None):
@@ -486,9 +1325,10 @@ def equal(val, msg=None):
             return value
         raise Invalid(_msg(msg, 'eq', 'invalid value'))
 
-    return f
+    return _pure(f)
 
 
+@_interned
 def not_equal(val, msg=None):
     @functools.wraps(not_equal)
     def f(value, context=None):
@@ -496,9 +1336,10 @@ def not_equal(val, msg=None):
             return value
         raise Invalid(_msg(msg, 'eq', 'invalid value'))
 
-    return f
+    return _pure(f)
 
 
+@_interned
 def empty(msg=None):
     @functools.wraps(empty)
     def f(value, context=None):
@@ -506,9 +1347,10 @@ def empty(msg=None):
             return value
         raise Invalid(_msg(msg, "empty", "No value was expected"))
 
-    return f
+    return _pure(f)
 
 
+@_interned
 def not_empty(msg=None):
     @functools.wraps(not_empty)
     def f(value, context=None):
@@ -516,7 +1358,7 @@ def not_empty(msg=None):
             return value
         raise Invalid(_msg(msg, 'notempty', "A non-empty value was expected"))
 
-    return f
+    return _pure(f)
 
 
 def strip(value, context=None):
@@ -531,6 +1373,10 @@ def strip(value, context=None):
         return value
 
 
+_pure(strip)
+
+
+@_interned
 def clamp(min=None, max=None, msg=None):
     """
     clamp a value between minimum and maximum values (either
@@ -545,9 +1391,10 @@ def clamp(min=None, max=None, msg=None):
             raise Invalid(_msg(msg, "max", "value above maximum"))
         return value
 
-    return f
+    return _pure(f)
 
 
+@_interned
 def clamp_length(min=None, max=None, msg=None):
     """
     clamp a value between minimum and maximum lengths (either
@@ -563,9 +1410,10 @@ def clamp_length(min=None, max=None, msg=None):
             raise Invalid(_msg(msg, "maxlen", "too long"))
         return value
 
-    return f
+    return _pure(f)
 
 
+@_interned
 def belongs(domain, msg=None):
     """
     ensures that the value belongs to the domain
@@ -578,9 +1426,10 @@ def belongs(domain, msg=None):
             return value
         raise Invalid(_msg(msg, "belongs", "invalid choice"))
 
-    return f
+    return _pure(f)
 
 
+@_interned
 def not_belongs(domain, msg=None):
     """
     ensures that the value does not belong to the domain
@@ -593,9 +1442,10 @@ def not_belongs(domain, msg=None):
             return value
         raise Invalid(_msg(msg, "not_belongs", "invalid choice"))
 
-    return f
+    return _pure(f)
 
 
+@_interned
 def parse_time(format, msg=None):
     """
     attempts to parse the time according to
@@ -610,9 +1460,10 @@ def parse_time(format, msg=None):
         except ValueError:
             raise Invalid(_msg(msg, 'parse_time', "invalid time"))
 
-    return f
+    return _pure(f)
 
 
+@_interned
 def parse_date(format, msg=None):
     """
     like parse_time, but returns a datetime.date object.
@@ -623,9 +1474,10 @@ def parse_date(format, msg=None):
         v = parse_time(format, msg)(value)
         return datetime.date(*v[:3])
 
-    return f
+    return _pure(f)
 
 
+@_interned
 def parse_datetime(format, msg=None):
     """
     like parse_time, but returns a datetime.datetime object.
@@ -636,28 +1488,88 @@ def parse_datetime(format, msg=None):
         v = parse_time(format, msg)(value)
         return datetime.datetime(*v[:6])
 
-    return f
+    return _pure(f)
+
+
+_canonical_uuid = re.compile(
+    r'[0-9a-fA-F]{8}-[0-9a-fA-F]{4}-[0-9a-fA-F]{4}-[0-9a-fA-F]{4}-'
+    r'[0-9a-fA-F]{12}\Z'
+)
+
+
+def _uuid_string(value):
+    """
+    returns the canonical form of a uuid given as a string in any
+    form UUID() accepts, as bytes holding such a string, or as 16
+    bytes; raises ValueError for anything else.
+    """
+    if isinstance(value, (bytes, bytearray)):
+        if len(value) == 16:
+            h = value.hex()
+            return '%s-%s-%s-%s-%s' % (
+                h[:8], h[8:12], h[12:16], h[16:20], h[20:])
+        value = value.decode('ascii')
+    elif not isinstance(value, str):
+        value = str(value)
+    if _canonical_uuid.match(value):
+        return value.lower()
+    return str(UUID(value))
 
 
+@_interned
 def uuid(msg=None, default=False):
     """
-    Accepts any value that can be converted to a uuid
+    Accepts any value that can be converted to a uuid, including
+    bytes holding one as text or as 16 binary bytes, and returns it
+    in canonical form.  If default is true, empty values are replaced
+    with the result of calling default, if it is callable, or with a
+    new uuid1().
     """
 
     @functools.wraps(uuid)
     def f(value, context=None):
+        if value.__class__ is str and _canonical_uuid.match(value):
+            return value.lower()
         try:
-            v = str(UUID(str(value)))
+            return _uuid_string(value)
         except ValueError:
             if default and not value:
-                return uuid1()
+                return default() if callable(default) else uuid1()
             else:
                 raise Invalid(_msg(msg, "uuid", "invalid uuid"))
-        return v
 
-    return f
+    return _pure(f)
 
 
+@_interned
+def uuids(msg=None):
+    """
+    validates a list (or any iterable) of uuids as uuid() does,
+    returning a list of them in canonical form.  Errors are keyed by
+    the positions of the values that failed.
+    """
+
+    @functools.wraps(uuids)
+    def f(values, context=None):
+        result = []
+        errors = {}
+        match = _canonical_uuid.match
+        for i, value in enumerate(values):
+            if value.__class__ is str and match(value):
+                result.append(value.lower())
+                continue
+            try:
+                result.append(_uuid_string(value))
+            except ValueError:
+                errors[i] = _msg(msg, "uuid", "invalid uuid")
+        if errors:
+            raise Invalid(errors)
+        return result
+
+    return _pure(f)
+
+
+@_interned
 def to_integer(msg=None):
     """
     Attempts to coerce the value to an integer.
@@ -678,9 +1590,10 @@ def to_integer(msg=None):
         except (TypeError, ValueError):
             raise Invalid(_msg(msg, "integer", "not an integer"))
 
-    return f
+    return _pure(f)
 
 
+@_interned
 def is_integer(msg=None):
     """
     Tests whether the value in an integer
@@ -693,9 +1606,10 @@ def is_integer(msg=None):
         else:
             raise Invalid(_msg(msg, "is_integer", "not an integer"))
 
-    return f
+    return _pure(f)
 
 
+@_interned
 def to_boolean(msg=None, fuzzy=False):
     """
     Coerces the value to one of True or False.  If `fuzzy` is `True`
@@ -722,37 +1636,123 @@ def to_boolean(msg=None, fuzzy=False):
                 return False
         return bool(value)
 
-    return f
+    return _pure(f)
 
 
+@_interned
 def regex(pat, msg=None):
     """
     tests the value against the given regex pattern
     and raises Invalid if it doesn't match.
     """
 
+    pattern = re.compile(pat)
+
     @functools.wraps(regex)
     def f(value, context=None):
-        m = re.match(pat, value)
+        m = pattern.match(value)
         if not m:
             raise Invalid(_msg(msg, 'regex', "does not match pattern"))
         return value
 
-    return f
+    return _pure(f)
+
+
+# constructs whose meaning depends on the numbering of groups, or on
+# flags that can't be scoped to part of a pattern
+_unsafe_to_combine = re.compile(
+    r'\\[1-9]|\\g<|\(\?P=|\(\?\(|\(\?[aiLmsux]+\)'
+)
+
+
+def _combine(patterns):
+    """
+    compiles a list of compiled patterns into a single alternation,
+    each wrapped in a group of its own, and returns it with a mapping
+    from wrapper group numbers to pattern indexes; returns None if the
+    patterns can't be combined without changing their meaning.
+    """
+    if len(set(p.flags for p in patterns)) > 1:
+        return None
+    if any(_unsafe_to_combine.search(
+        p.pattern if isinstance(p.pattern, str) else
+        p.pattern.decode('latin-1')
+    ) for p in patterns):
+        return None
+    index = {}
+    group = 1
+    for i, p in enumerate(patterns):
+        index[group] = i
+        group += p.groups + 1
+    if isinstance(patterns[0].pattern, str):
+        source = '|'.join('(%s)' % p.pattern for p in patterns)
+    else:
+        source = b'|'.join(b'(%s)' % p.pattern for p in patterns)
+    try:
+        combined = re.compile(source, patterns[0].flags)
+    except (re.error, TypeError):
+        return None
+    return combined, index
+
+
+def regex_any(patterns, msg=None):
+    """
+    tests the value against each of the given regex patterns and
+    raises Invalid if none of them match.  The patterns are compiled
+    into a single alternation when the validator is built, so a value
+    is matched once whichever pattern it matches; patterns that can't
+    be combined (ones using backreferences or differing flags) are
+    tried in turn instead.  f.which(value) returns the index of the
+    first pattern that matches, or None.
+    """
+
+    compiled = [re.compile(p) for p in patterns]
+    combined = _combine(compiled) if compiled else None
 
+    if combined is not None:
+        pattern, index = combined
 
+        def which(value):
+            m = pattern.match(value)
+            if m is None:
+                return None
+            return index[m.lastindex]
+    else:
+
+        def which(value):
+            for i, p in enumerate(compiled):
+                if p.match(value):
+                    return i
+            return None
+
+    @functools.wraps(regex_any)
+    def f(value, context=None):
+        if which(value) is None:
+            raise Invalid(_msg(msg, 'regex', "does not match pattern"))
+        return value
+
+    f.which = which
+    f.patterns = compiled
+    f.combined = combined is not None
+    return _pure(f)
+
+
+@_interned
 def regex_sub(pat, sub):
     """
     performs regex substitution on the input value.
     """
 
+    pattern = re.compile(pat)
+
     @functools.wraps(regex_sub)
     def f(value, context=None):
-        return re.sub(pat, sub, value)
+        return pattern.sub(sub, value)
 
-    return f
+    return _pure(f)
 
 
+@_interned
 def fields_equal(msg=None, field=_default):
     """
     when passed a collection of values,
@@ -769,9 +1769,10 @@ def fields_equal(msg=None, field=_default):
                 raise Invalid(m, field=field)
         return values
 
-    return f
+    return _pure(f)
 
 
+@_interned
 def fields_match(name1, name2, msg=None, field=_default):
     """
     verifies that the values associated with the keys 'name1' and
@@ -788,34 +1789,243 @@ def fields_match(name1, name2, msg=None, field=_default):
                 raise Invalid({field: m})
         return value
 
+    return _pure(f)
+
+
+class _FieldsFrame(object):
+    """
+    the state of a nested() validator part way through its fields.
+    """
+
+    __slots__ = ('value', 'fields', 'data', 'errors', 'key')
+
+    def __init__(self, fields, value):
+        self.value = value
+        self.fields = iter(fields)
+        self.data = dict()
+        self.errors = dict()
+
+    def step(self, ok, result):
+        if ok:
+            self.data[self.key] = result
+        elif isinstance(result, (KeyError, TypeError)):
+            self.errors[self.key] = "key %r is missing" % self.key
+        elif isinstance(result, Invalid):
+            self.errors[self.key] = result
+        elif result is not None:
+            return _DONE, False, result
+        for k, v in self.fields:
+            try:
+                x = self.value[k]
+            except (KeyError, TypeError):
+                self.errors[k] = "key %r is missing" % k
+                continue
+            self.key = k
+            return _CALL, v, x
+        if self.errors:
+            return _DONE, False, Invalid(self.errors)
+        return _DONE, True, self.data
+
+
+class _ManyFrame(object):
+    """
+    the state of a nested_many() validator part way through its values.
+    """
+
+    __slots__ = ('validator', 'items', 'data', 'errors', 'key')
+
+    def __init__(self, validator, value):
+        self.validator = validator
+        self.items = None
+        if value:
+            self.items = iter(list(value.items()))
+        self.data = dict()
+        self.errors = dict()
+
+    def step(self, ok, result):
+        if self.items is None:
+            return _DONE, False, Invalid("No data found")
+        if ok:
+            self.data[self.key] = result
+        elif isinstance(result, Invalid):
+            self.errors[self.key] = result
+        elif result is not None:
+            return _DONE, False, result
+        for k, v in self.items:
+            self.key = k
+            return _CALL, self.validator, v
+        if self.errors:
+            return _DONE, False, Invalid(self.errors)
+        return _DONE, True, self.data
+
+
+class _ChainFrame(object):
+    """
+    the state of an all_of() validator part way through its chain.
+    """
+
+    __slots__ = ('validators', 'value')
+
+    def __init__(self, validators, value):
+        self.validators = iter(validators)
+        self.value = value
+
+    def step(self, ok, result):
+        if ok:
+            self.value = result
+        elif result is not None:
+            return _DONE, False, result
+        for v in self.validators:
+            return _CALL, v, self.value
+        return _DONE, True, self.value
+
+
+class _RefFrame(object):
+    """
+    the state of a recursive() reference, which passes its value on
+    to the validator it refers to.
+    """
+
+    __slots__ = ('target', 'value', 'called')
+
+    def __init__(self, target, value):
+        if not target:
+            raise ValueError("recursive() validator used before define()")
+        self.target = target[0]
+        self.value = value
+        self.called = False
+
+    def step(self, ok, result):
+        if not self.called:
+            self.called = True
+            return _CALL, self.target, self.value
+        return _DONE, ok, result
+
+
+_CALL = 'call'
+_DONE = 'done'
+
+
+def _walk(validator, value, context, max_depth=None, msg=None):
+    """
+    applies a validator built from nested(), nested_many() and
+    all_of() to a document, keeping the state of each level on an
+    explicit stack instead of recursing, so that documents of any
+    depth can be validated.  Other validators are called directly.
+
+    nested() and nested_many() levels deeper than max_depth fail
+    without being validated.
+    """
+    # frames are (frame, nesting depth)
+    stack = []
+    depth = 0
+    while True:
+        walk = _walk_frame(validator)
+        if walk is None:
+            try:
+                ok, result = True, validator(value, context=context)
+            except Exception as e:
+                ok, result = False, e
+        else:
+            frame, args, nesting = walk
+            if nesting:
+                depth += 1
+            if max_depth is not None and depth > max_depth:
+                ok, result = False, Invalid(
+                    _msg(msg, 'max_depth', 'too deeply nested')
+                )
+            else:
+                try:
+                    stack.append((frame(args, value), depth))
+                except Exception as e:
+                    ok, result = False, e
+                else:
+                    ok, result = False, None
+        while stack:
+            frame, depth = stack[-1]
+            step = frame.step(ok, result)
+            if step[0] is _CALL:
+                validator, value = step[1], step[2]
+                break
+            stack.pop()
+            ok, result = step[1], step[2]
+        else:
+            if ok:
+                return result
+            raise result
+
+
+def recursive():
+    """
+    A forward reference, for validators of documents that contain
+    documents of the same kind.  Use it where the validator refers to
+    itself, then define it:
+
+    >>> tree = recursive()
+    >>> tree.define(nested(name=not_empty(),
+    ...                    children=nested_many(tree)))
+
+    The reference is followed by the same loop that applies nested()
+    and nested_many(), so deeply nested documents don't run into
+    Python's recursion limit, and limit_depth() counts the levels
+    below the reference as levels of the same document.
+    """
+    target = []
+
+    @functools.wraps(recursive)
+    def f(value, context=None):
+        return _walk(f, value, context)
+
+    def define(validator):
+        if isinstance(validator, tuple):
+            validator = all_of(*validator)
+        target[:] = [validator]
+
+    f.define = define
+    _walk_frames[f] = (_RefFrame, target, False)
+    return f
+
+
+def limit_depth(validator, max_depth, msg=None):
+    """
+    applies a validator built from nested(), nested_many() and
+    all_of(), failing any nested() or nested_many() level deeper than
+    max_depth instead of validating it.
+    """
+
+    @functools.wraps(limit_depth)
+    def f(value, context=None):
+        return _walk(validator, value, context, max_depth, msg)
+
+    if _is_pure(validator):
+        _pure(f)
     return f
 
 
+@_interned
 def nested(**kwargs):
     """
     Behaves like a dict.  It's keys are names, it's values are validators
+
+    Nested validators are applied without recursion, so that deeply
+    nested documents don't run into Python's recursion limit.
     """
+    fields = tuple(
+        (k, all_of(*v) if isinstance(v, tuple) else v)
+        for k, v in kwargs.items()
+    )
 
     @functools.wraps(nested)
     def f(value, context=None):
-        data = dict()
-        errors = dict()
-        for k, v in kwargs.items():
-            if isinstance(v, tuple):
-                v = all_of(*v)
-            try:
-                data[k] = v(value[k], context=context)
-            except (KeyError, TypeError):
-                errors[k] = "key %r is missing" % k
-            except Invalid as e:
-                errors[k] = e
-        if errors:
-            raise Invalid(errors)
-        return data
+        return _walk(f, value, context)
 
+    _walk_frames[f] = (_FieldsFrame, fields, True)
+    if _all_pure(v for k, v in fields):
+        _pure(f)
     return f
 
 
+@_interned
 def nested_many(sub_validator):
     """
     Applies the validator to each of the values
@@ -823,24 +2033,66 @@ def nested_many(sub_validator):
 
     @functools.wraps(nested_many)
     def f(value, context=None):
-        data = dict()
-        errors = dict()
-        if value:
-            for k, v in list(value.items()):
-                try:
-                    data[k] = sub_validator(v, context=context)
-                except Invalid as e:
-                    errors[k] = e
-            if errors:
-                raise Invalid(errors)
-            else:
-                return data
-        else:
-            raise Invalid("No data found")
+        return _walk(f, value, context)
 
+    _walk_frames[f] = (_ManyFrame, sub_validator, True)
+    if _is_pure(sub_validator):
+        _pure(f)
     return f
 
 
+def _stream(validator, pairs, context, max_errors, msg):
+    failures = 0
+    for k, v in pairs:
+        try:
+            result = validator(v, context=context)
+        except Invalid as e:
+            failures += 1
+            if max_errors is not None and failures > max_errors:
+                raise Invalid(_msg(msg, 'max_errors', 'too many errors'))
+            result = e
+        yield k, result
+
+
+def stream_many(sub_validator, max_errors=None, msg=None):
+    """
+    A lazy nested_many(): returns a generator that applies the
+    validator to each of the values of a dict (or an iterable of
+    (key, value) pairs), yielding (key, result) pairs as it goes.
+    Where a value fails, the result is the Invalid exception.
+
+    Nothing is collected, so memory use does not grow with the size
+    of the input.  If max_errors is given, the generator raises
+    Invalid when more than that many values have failed.
+    """
+
+    @functools.wraps(stream_many)
+    def f(value, context=None):
+        try:
+            pairs = value.items()
+        except AttributeError:
+            pairs = value
+        return _stream(sub_validator, pairs, context, max_errors, msg)
+
+    return f
+
+
+def stream_list(sub_validator, max_errors=None, msg=None):
+    """
+    Like stream_many(), but for a list (or any iterable) of values;
+    the keys yielded are the positions of the values.
+    """
+
+    @functools.wraps(stream_list)
+    def f(value, context=None):
+        return _stream(
+            sub_validator, enumerate(value), context, max_errors, msg
+        )
+
+    return f
+
+
+@_interned
 def only_one_of(msg=None, field=None):
     """
     Check that only one of the given values is True.
@@ -856,4 +2108,4 @@ def only_one_of(msg=None, field=None):
                 raise Invalid(m)
         return values
 
-    return f
+    return _pure(f)
@@ -0,0 +1,164 @@
+# -*- coding: utf-8 -*-
+"""
+Validators for binary data that work on bytes, bytearray and
+memoryview values directly, without decoding them to str first.
+
+They report the same message keys as their str counterparts in
+validino.base, so the same msg dictionaries can be used with both.
+"""
+
+import functools
+import re
+
+from validino.base import Invalid, _interned, _msg, _pure
+
+__all__ = [
+    'bytes_strip', 'bytes_clamp_length', 'bytes_regex', 'is_ascii',
+    'is_utf8', 'bytes_to_integer'
+]
+
+_whitespace = frozenset(b' \t\n\r\x0b\x0c')
+
+_non_ascii = re.compile(rb'[\x80-\xff]')
+
+_continuation = re.compile(rb'[\x80-\xbf]')
+
+_utf8 = re.compile(
+    rb'(?:[\x00-\x7f]+'
+    rb'|[\xc2-\xdf][\x80-\xbf]'
+    rb'|\xe0[\xa0-\xbf][\x80-\xbf]'
+    rb'|[\xe1-\xec\xee\xef][\x80-\xbf]{2}'
+    rb'|\xed[\x80-\x9f][\x80-\xbf]'
+    rb'|\xf0[\x90-\xbf][\x80-\xbf]{2}'
+    rb'|[\xf1-\xf3][\x80-\xbf]{3}'
+    rb'|\xf4[\x80-\x8f][\x80-\xbf]{2})*'
+)
+
+
+def _view(value):
+    """
+    returns a memoryview as a flat sequence of bytes, without
+    copying it.
+    """
+    if value.format != 'B' or value.ndim != 1:
+        return value.cast('B')
+    return value
+
+
+def bytes_strip(value, context=None):
+    """
+    strips ASCII whitespace from both ends of a bytes-like value.  A
+    memoryview is sliced rather than copied.  For other values, does
+    nothing; raises no exceptions.
+    """
+    if isinstance(value, memoryview):
+        value = _view(value)
+        start, end = 0, len(value)
+        while start < end and value[start] in _whitespace:
+            start += 1
+        while end > start and value[end - 1] in _whitespace:
+            end -= 1
+        return value[start:end]
+    try:
+        return value.strip()
+    except AttributeError:
+        return value
+
+
+_pure(bytes_strip)
+
+
+@_interned
+def bytes_clamp_length(min=None, max=None, codepoints=False, msg=None):
+    """
+    clamp the length of a bytes-like value between minimum and
+    maximum lengths (either of which are optional).  The length is
+    measured in bytes, or if codepoints is true, in the code points
+    of the UTF-8 text the value holds (which is assumed to be well
+    formed; see is_utf8()).
+    """
+
+    @functools.wraps(bytes_clamp_length)
+    def f(value, context=None):
+        data = value
+        if isinstance(value, memoryview):
+            vlen = value.nbytes
+            if codepoints:
+                data = _view(value)
+        else:
+            vlen = len(value)
+        if codepoints and _non_ascii.search(data):
+            vlen -= len(_continuation.findall(data))
+        if min is not None and vlen < min:
+            raise Invalid(_msg(msg, "minlen", "too short"))
+        if max is not None and vlen > max:
+            raise Invalid(_msg(msg, "maxlen", "too long"))
+        return value
+
+    return _pure(f)
+
+
+@_interned
+def bytes_regex(pat, msg=None):
+    """
+    tests a bytes-like value against the given bytes regex pattern
+    and raises Invalid if it doesn't match.
+    """
+    pattern = re.compile(pat)
+
+    @functools.wraps(bytes_regex)
+    def f(value, context=None):
+        if not pattern.match(value):
+            raise Invalid(_msg(msg, 'regex', "does not match pattern"))
+        return value
+
+    return _pure(f)
+
+
+@_interned
+def is_ascii(msg=None):
+    """
+    tests whether a bytes-like value is pure ASCII.
+    """
+
+    @functools.wraps(is_ascii)
+    def f(value, context=None):
+        if _non_ascii.search(value):
+            raise Invalid(_msg(msg, 'to_unicode', 'encoding error'))
+        return value
+
+    return _pure(f)
+
+
+@_interned
+def is_utf8(msg=None):
+    """
+    tests whether a bytes-like value is well-formed UTF-8.
+    """
+
+    @functools.wraps(is_utf8)
+    def f(value, context=None):
+        data = value
+        if isinstance(value, memoryview):
+            data = _view(value)
+        if _utf8.match(data).end() != len(data):
+            raise Invalid(_msg(msg, 'to_unicode', 'encoding error'))
+        return value
+
+    return _pure(f)
+
+
+@_interned
+def bytes_to_integer(msg=None):
+    """
+    parses a bytes-like value holding ASCII digits as an integer.
+    """
+
+    @functools.wraps(bytes_to_integer)
+    def f(value, context=None):
+        try:
+            return int(value)
+        except (TypeError, ValueError):
+            raise Invalid(_msg(msg, "integer", "not an integer"))
+
+    return _pure(f)
@@ -0,0 +1,274 @@
+# -*- coding: utf-8 -*-
+"""
+Domains for belongs() and not_belongs() that are too large to hold
+in memory as sets.
+
+A SortedFileDomain answers membership queries by binary search over
+a file of sorted, newline-delimited values that is memory-mapped
+rather than read, so it costs no load time, and the pages it touches
+are shared between every worker process that maps the same file.  A
+BloomFilter placed in front of it rejects most absent values without
+touching the file at all:
+
+>>> import validino as V
+>>> from validino.domains import build_domain, SortedFileDomain
+>>> build_domain(['hunter2', 'letmein', 'password'],
+...              '/tmp/leaked.txt', bloom_path='/tmp/leaked.bloom')
+3
+>>> leaked = SortedFileDomain('/tmp/leaked.txt', bloom='/tmp/leaked.bloom')
+>>> v = V.not_belongs(leaked, msg='that password has been leaked')
+>>> v('correct horse battery staple')
+'correct horse battery staple'
+
+Domain files can also be built from the command line, one value per
+line of the input:
+
+  python -m validino.domains passwords.txt leaked.txt --bloom leaked.bloom
+"""
+
+import argparse
+import contextlib
+import hashlib
+import math
+import mmap
+import os
+import struct
+import sys
+import tempfile
+
+__all__ = ['SortedFileDomain', 'BloomFilter', 'build_domain']
+
+_BLOOM_HEADER = struct.Struct('<4sQB')
+
+_BLOOM_MAGIC = b'VBLM'
+
+
+def _key(value, encoding):
+    """
+    returns value as bytes, or None if it can't be in a domain file.
+    """
+    if isinstance(value, str):
+        value = value.encode(encoding)
+    elif not isinstance(value, bytes):
+        return None
+    if b'\n' in value:
+        return None
+    return value
+
+
+@contextlib.contextmanager
+def _replacing(path):
+    """
+    yields a binary file to write to, which replaces path atomically
+    when the block succeeds.
+    """
+    fd, tmp = tempfile.mkstemp(dir=os.path.dirname(os.path.abspath(path)))
+    try:
+        with os.fdopen(fd, 'wb') as f:
+            yield f
+        os.replace(tmp, path)
+    except BaseException:
+        os.unlink(tmp)
+        raise
+
+
+def _map(path):
+    """
+    maps a file read-only, returning None for an empty file, which
+    can't be mapped.
+    """
+    with open(path, 'rb') as f:
+        if not os.fstat(f.fileno()).st_size:
+            return None
+        return mmap.mmap(f.fileno(), 0, access=mmap.ACCESS_READ)
+
+
+class BloomFilter(object):
+    """
+    a Bloom filter over bytes and str values.  Values that were added
+    are always reported as present; of the rest, roughly error_rate
+    are wrongly reported as present too.  A filter saved with save()
+    is memory-mapped by load().
+    """
+
+    def __init__(self, capacity=None, error_rate=0.01, bits=None,
+                 hashes=None, data=None, encoding='utf8'):
+        if bits is None:
+            capacity = max(capacity or 1, 1)
+            bits = int(math.ceil(
+                -capacity * math.log(error_rate) / math.log(2) ** 2))
+            hashes = max(1, int(round(bits / capacity * math.log(2))))
+        self.bits = bits
+        self.hashes = hashes
+        self.encoding = encoding
+        if data is None:
+            data = bytearray((bits + 7) // 8)
+        self.data = data
+        self.path = None
+
+    @classmethod
+    def load(cls, path, encoding='utf8'):
+        """
+        maps a filter written by save().
+        """
+        mm = _map(path)
+        if mm is None or mm[:4] != _BLOOM_MAGIC:
+            raise ValueError("%s is not a Bloom filter" % path)
+        magic, bits, hashes = _BLOOM_HEADER.unpack_from(mm)
+        bf = cls(
+            bits=bits, hashes=hashes,
+            data=memoryview(mm)[_BLOOM_HEADER.size:], encoding=encoding)
+        bf.path = path
+        return bf
+
+    def save(self, path):
+        with _replacing(path) as f:
+            f.write(_BLOOM_HEADER.pack(_BLOOM_MAGIC, self.bits, self.hashes))
+            f.write(self.data)
+
+    def _positions(self, key):
+        digest = hashlib.blake2b(key, digest_size=16).digest()
+        a = int.from_bytes(digest[:8], 'little')
+        b = int.from_bytes(digest[8:], 'little') | 1
+        bits = self.bits
+        return [(a + i * b) % bits for i in range(self.hashes)]
+
+    def add(self, value):
+        key = _key(value, self.encoding)
+        if key is None:
+            raise ValueError("can't add %r to a Bloom filter" % (value,))
+        data = self.data
+        for p in self._positions(key):
+            data[p >> 3] |= 1 << (p & 7)
+
+    def __contains__(self, value):
+        key = _key(value, self.encoding)
+        if key is None:
+            return False
+        data = self.data
+        for p in self._positions(key):
+            if not data[p >> 3] & (1 << (p & 7)):
+                return False
+        return True
+
+    def __reduce__(self):
+        if self.path is not None:
+            return (BloomFilter.load, (self.path, self.encoding))
+        return (BloomFilter, (
+            None, None, self.bits, self.hashes, self.data, self.encoding))
+
+
+class SortedFileDomain(object):
+    """
+    a domain held in a file of sorted, distinct, newline-delimited
+    values (as written by build_domain()), searched in place through
+    a memory map.  Values may be str, which are encoded, or bytes;
+    anything else is never a member.  bloom may be a BloomFilter, or
+    the path of one, consulted before the file.
+    """
+
+    def __init__(self, path, bloom=None, encoding='utf8'):
+        self.path = path
+        self.encoding = encoding
+        if isinstance(bloom, str):
+            bloom = BloomFilter.load(bloom, encoding)
+        self.bloom = bloom
+        self._mm = _map(path)
+
+    def __contains__(self, value):
+        key = _key(value, self.encoding)
+        if key is None or self._mm is None:
+            return False
+        if self.bloom is not None and key not in self.bloom:
+            return False
+        mm = self._mm
+        # lo is always the start of a line and hi the end of one
+        lo, hi = 0, len(mm)
+        while lo < hi:
+            mid = (lo + hi) // 2
+            start = mm.rfind(b'\n', lo, mid) + 1 or lo
+            end = mm.find(b'\n', start, hi)
+            if end < 0:
+                end = hi
+            line = mm[start:end]
+            if line == key:
+                return True
+            if line < key:
+                lo = end + 1
+            else:
+                hi = start
+        return False
+
+    def __iter__(self):
+        if self._mm is None:
+            return iter(())
+        return iter(self._mm[:].splitlines())
+
+    def close(self):
+        if self._mm is not None:
+            self._mm.close()
+
+    def __enter__(self):
+        return self
+
+    def __exit__(self, *exc_info):
+        self.close()
+
+    def __reduce__(self):
+        return (SortedFileDomain, (self.path, self.bloom, self.encoding))
+
+
+def build_domain(values, path, bloom_path=None, error_rate=0.01,
+                 encoding='utf8'):
+    """
+    writes the distinct values, which may be str or bytes, to path
+    in the sorted form SortedFileDomain reads, and if bloom_path is
+    given, a Bloom filter over them with the given error rate.
+    Values are sorted in memory.  Returns the number of values
+    written.
+    """
+    keys = set()
+    for value in values:
+        key = _key(value, encoding)
+        if not key:
+            raise ValueError("can't store %r in a domain file" % (value,))
+        keys.add(key)
+    keys = sorted(keys)
+    with _replacing(path) as f:
+        for key in keys:
+            f.write(key)
+            f.write(b'\n')
+    if bloom_path is not None:
+        bloom = BloomFilter(len(keys), error_rate, encoding=encoding)
+        for key in keys:
+            bloom.add(key)
+        bloom.save(bloom_path)
+    return len(keys)
+
+
+def main(argv=None):
+    parser = argparse.ArgumentParser(
+        prog='python -m validino.domains',
+        description="build a sorted domain file for SortedFileDomain "
+        "from a file of values, one per line")
+    parser.add_argument('input', help="file of values, or - for stdin")
+    parser.add_argument('output', help="domain file to write")
+    parser.add_argument('--bloom', help="Bloom filter file to write")
+    parser.add_argument(
+        '--error-rate', type=float, default=0.01,
+        help="false positive rate of the Bloom filter (default 0.01)")
+    args = parser.parse_args(argv)
+
+    if args.input == '-':
+        infile = contextlib.nullcontext(sys.stdin.buffer)
+    else:
+        infile = open(args.input, 'rb')
+    with infile as lines:
+        count = build_domain(
+            (line.rstrip(b'\r\n') for line in lines if line.strip()),
+            args.output, args.bloom, args.error_rate)
+    print("wrote %d values to %s" % (count, args.output))
+
+
+if __name__ == '__main__':
+    main()
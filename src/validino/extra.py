@@ -3,19 +3,24 @@
 Some validators commonly used in web applications.
 """
 
+import collections
+import functools
+import hashlib
 import http.client
 import re
 import socket
+import threading
+import time
 import urllib.parse
 
-from validino.base import Invalid, _msg, regex
+from validino.base import Invalid, _msg, _pure, regex
 from validino.util import partial
 
 # lifted from formencode
 _usernameRE = re.compile(r"^[^ \t\n\r@<>()]+$", re.I)
 _domainRE = re.compile(r"^[a-z0-9][a-z0-9\.\-_]*\.[a-z]+$", re.I)
 
-__all__ = ['ip', 'url']
+__all__ = ['ip', 'url', 'email', 'DomainChecker', 'upload', 'FileInfo']
 
 _ip_pat = '^%s$' % r'\.'.join(['|'.join([str(x) for x in range(256)] * 4)])
 
@@ -28,35 +33,121 @@ _error_message = (
     "existence check not supported for schemas other than http and https"
 )
 
+_http_schemas = frozenset(('http', 'https'))
+
+_default_ports = {'http': 80, 'https': 443}
+
+# absolute http(s) urls that urlparse() and urlunparse() would give
+# back unchanged: printable ASCII only, no path parameters, and no
+# empty query or fragment.
+_fast_url = re.compile(
+    r'(https?)://[^\x00-\x20/?#;\[\]\x7f-\U0010ffff]+'
+    r'(?:/[^\x00-\x20?#;\x7f-\U0010ffff]*)?'
+    r'(?:\?[^\x00-\x20#\x7f-\U0010ffff]+)?'
+    r'(?:#[^\x00-\x20\x7f-\U0010ffff]+)?\Z'
+)
+
+
+def _normalize_url(url, msg=None):
+    """
+    lowercases the schema and host of a url, drops the port if it is
+    the schema's default, and IDNA-encodes the host.
+    """
+    parts = urllib.parse.urlsplit(url)
+    host = parts.hostname
+    if not host:
+        return url
+    try:
+        port = parts.port
+        host = host.encode('idna').decode('ascii')
+    except (ValueError, UnicodeError):
+        raise Invalid(_msg(msg, 'url.host', 'invalid host'))
+    if ':' in host:
+        host = '[%s]' % host
+    if port is not None and port != _default_ports.get(parts.scheme):
+        host = '%s:%d' % (host, port)
+    userinfo, at, hostport = parts.netloc.rpartition('@')
+    return urllib.parse.urlunsplit(
+        (parts.scheme, userinfo + at + host, parts.path, parts.query,
+         parts.fragment)
+    )
+
+
+class _UrlNormalizer(object):
+    """
+    normalizes urls for url(), caching the most recent results.  The
+    cache is not pickled, so validators using it can be saved as
+    artifacts.
+    """
+
+    def __init__(self, cache_size, msg):
+        self.cache_size = cache_size
+        self.msg = msg
+        self._normalize = functools.lru_cache(cache_size)(
+            functools.partial(_normalize_url, msg=msg)
+        )
+
+    def __call__(self, value):
+        return self._normalize(value)
+
+    def __reduce__(self):
+        return _UrlNormalizer, (self.cache_size, self.msg)
+
 
 def url(
     check_exists=False,
     schemas=('http', 'https'),
     default_schema='http',
     default_host='',
+    normalize=False,
+    cache_size=1024,
     msg=None
 ):
-    def f(value):
-        cant_check = (
-            f.check_exists and
-            set(f.schemas).difference(set(('http', 'https')))
-        )
+    """
+    tests whether the value is a url with one of the given schemas,
+    filling in the default schema and host if they are missing.  If
+    check_exists is true, makes a HEAD request for the url, which must
+    succeed.
+
+    If normalize is true, the url returned has a lowercase host
+    without the default port, encoded with IDNA; the most recent
+    cache_size results are cached.
+
+    The options are fixed when the validator is built; the attributes
+    of the same names on the validator are for reference only.
+    """
+    schemas = frozenset(schemas)
+    cant_check = check_exists and schemas.difference(_http_schemas)
+    if normalize:
+        normalized = _UrlNormalizer(cache_size, msg)
+    else:
+        normalized = None
+
+    def f(value, context=None):
         if cant_check:
             raise RuntimeError(_error_message)
+        if not check_exists and isinstance(value, str):
+            m = _fast_url.match(value)
+            if m is not None and m.group(1) in schemas:
+                if normalized:
+                    return normalized(value)
+                return value
         schema, netloc, path, params, query, fragment = urllib.parse.urlparse(
             value
         )
-        if schema not in f.schemas:
-            raise Invalid(_msg(f.msg, "url.schema", "schema not allowed"))
-        if schema == '' and f.default_schema:
-            schema = f.default_schema
-        if netloc == '' and f.default_host:
-            netloc = f.default_host
+        if schema not in schemas:
+            raise Invalid(_msg(msg, "url.schema", "schema not allowed"))
+        if schema == '' and default_schema:
+            schema = default_schema
+        if netloc == '' and default_host:
+            netloc = default_host
 
         url = urllib.parse.urlunparse(
             (schema, netloc, path, params, query, fragment)
         )
-        if f.check_exists:
+        if normalized:
+            url = normalized(url)
+        if check_exists:
             newpath = urllib.parse.urlunparse(
                 ('', '', path, params, query, fragment)
             )
@@ -71,17 +162,263 @@ def url(
                 c.request('HEAD', newpath)
                 res = c.getresponse()
             except (http.client.HTTPException, socket.error) as e:
-                raise Invalid(_msg(f.msg, "url.http_error", "http error"))
+                raise Invalid(_msg(msg, "url.http_error", "http error"))
             else:
                 if 200 <= res.status < 400:
                     # this fudges on redirects.
                     return url
-                raise Invalid(_msg(f.msg, 'url.not_exists', "url not OK"))
+                raise Invalid(_msg(msg, 'url.not_exists', "url not OK"))
         return url
 
     f.default_schema = default_schema
     f.default_host = default_host
     f.check_exists = check_exists
+    f.blocking = check_exists
     f.schemas = schemas
     f.msg = msg
+    return _pure(f)
+
+
+def _resolve(domain):
+    """
+    the default resolver for DomainChecker: true if the domain has
+    an address record.  (The standard library can't look up MX
+    records; pass a resolver built on a DNS library for that.)
+    """
+    try:
+        socket.getaddrinfo(domain, None)
+    except (socket.error, UnicodeError):
+        return False
+    return True
+
+
+class DomainChecker(object):
+    """
+    checks whether domains exist by calling resolver(domain), which
+    should return true or false.
+
+    Answers are cached for ttl seconds in a cache holding at most
+    maxsize domains, and no more than max_concurrent lookups run at
+    once, so a burst of signups from the same few domains results in
+    a handful of lookups rather than one per request.
+    """
+
+    def __init__(
+        self,
+        resolver=_resolve,
+        ttl=300,
+        maxsize=1024,
+        max_concurrent=4,
+        clock=time.monotonic,
+    ):
+        self.resolver = resolver
+        self.ttl = ttl
+        self.maxsize = maxsize
+        self.clock = clock
+        self._cache = collections.OrderedDict()
+        self._lock = threading.Lock()
+        self._slots = threading.BoundedSemaphore(max_concurrent)
+
+    def _cached(self, domain):
+        with self._lock:
+            try:
+                expires, exists = self._cache[domain]
+            except KeyError:
+                return None
+            if expires <= self.clock():
+                del self._cache[domain]
+                return None
+            self._cache.move_to_end(domain)
+            return exists
+
+    def __call__(self, domain):
+        domain = domain.lower()
+        exists = self._cached(domain)
+        if exists is not None:
+            return exists
+        with self._slots:
+            # another thread may have looked it up while we waited
+            exists = self._cached(domain)
+            if exists is not None:
+                return exists
+            exists = bool(self.resolver(domain))
+        with self._lock:
+            self._cache[domain] = (self.clock() + self.ttl, exists)
+            self._cache.move_to_end(domain)
+            while len(self._cache) > self.maxsize:
+                self._cache.popitem(last=False)
+        return exists
+
+
+_default_checker = None
+
+
+def email(msg=None, check_domain=False):
+    """
+    tests whether the value is a well-formed email address.
+
+    If check_domain is true, the domain must also exist; it may be a
+    DomainChecker (or any callable taking a domain and returning true
+    or false), or True to use a DomainChecker shared by all email
+    validators.
+    """
+    global _default_checker
+    if check_domain is True:
+        if _default_checker is None:
+            _default_checker = DomainChecker()
+        check_domain = _default_checker
+
+    @functools.wraps(email)
+    def f(value, context=None):
+        try:
+            username, at, domain = value.partition('@')
+        except AttributeError:
+            raise Invalid(_msg(msg, 'email', 'invalid email address'))
+        if not (
+            at and _usernameRE.fullmatch(username) and
+            _domainRE.fullmatch(domain)
+        ):
+            raise Invalid(_msg(msg, 'email', 'invalid email address'))
+        if check_domain and not check_domain(domain):
+            raise Invalid(_msg(msg, 'email.domain', 'domain does not exist'))
+        return value
+
+    f.blocking = bool(check_domain)
+    return _pure(f)
+
+
+# leading bytes of common file formats, longest first where one is a
+# prefix of another
+_magic = (
+    (b'\x89PNG\r\n\x1a\n', 'image/png'),
+    (b'GIF87a', 'image/gif'),
+    (b'GIF89a', 'image/gif'),
+    (b'%PDF-', 'application/pdf'),
+    (b'\xff\xd8\xff', 'image/jpeg'),
+    (b'PK\x03\x04', 'application/zip'),
+    (b'\x1f\x8b', 'application/gzip'),
+)
+
+_sniff_size = 512
+
+FileInfo = collections.namedtuple(
+    'FileInfo', ['size', 'content_type', 'digest', 'lines']
+)
+
+
+def _sniff(head):
+    """
+    guesses the content type of a file from its first bytes.
+    """
+    for magic, content_type in _magic:
+        if head.startswith(magic):
+            return content_type
+    if b'\0' in head:
+        return 'application/octet-stream'
+    return 'text/plain'
+
+
+def _chunks(value, chunk_size):
+    read = getattr(value, 'read', None)
+    if read is None:
+        if isinstance(value, (bytes, bytearray, memoryview, str)):
+            raise TypeError()
+        return iter(value)
+    return iter(functools.partial(read, chunk_size), b'')
+
+
+def upload(
+    max_size=None, types=None, digest=None, checksum=None, max_lines=None,
+    sink=None, chunk_size=65536, msg=None
+):
+    """
+    validates an uploaded file as it is read, without holding it in
+    memory.  The value may be a binary file-like object or an
+    iterable of bytes-like chunks; reading stops as soon as a limit is
+    broken.
+
+    max_size limits the size in bytes and max_lines the number of
+    lines.  types, if given, is the collection of allowed content
+    types, as guessed from the first bytes of the file ('image/png',
+    'application/pdf', 'text/plain', ...).  digest names a hashlib
+    algorithm to hash the file with, and checksum, if given, is the
+    hex digest it must have.  Each chunk read is passed to sink, if
+    given, for instance to write it to a temporary file; when types
+    is given, the first chunks are held back until the content type
+    is known to be allowed, so that nothing of a file of the wrong
+    type reaches the sink.
+
+    Returns a FileInfo with the size, content type, hex digest (or
+    None) and number of lines.
+    """
+    if checksum is not None and digest is None:
+        raise ValueError("checksum requires digest")
+
+    @functools.wraps(upload)
+    def f(value, context=None):
+        try:
+            chunks = _chunks(value, chunk_size)
+        except TypeError:
+            raise Invalid(_msg(msg, 'upload.file', 'not a file'))
+        hasher = hashlib.new(digest) if digest is not None else None
+        size = 0
+        lines = 0
+        head = b''
+        last = b''
+        content_type = None
+        # chunks read before the content type is known
+        held = []
+        for chunk in chunks:
+            if isinstance(chunk, memoryview):
+                # as a reader built on readinto() yields, into a buffer
+                # that is reused for the next chunk
+                chunk = chunk.tobytes()
+            elif not isinstance(chunk, (bytes, bytearray)):
+                raise Invalid(_msg(msg, 'upload.file', 'not a file'))
+            if not chunk:
+                continue
+            size += len(chunk)
+            if max_size is not None and size > max_size:
+                raise Invalid(_msg(msg, 'upload.size', 'file too large'))
+            if content_type is None:
+                head += bytes(chunk[:_sniff_size - len(head)])
+                if len(head) >= _sniff_size:
+                    content_type = _sniff(head)
+                    if types is not None and content_type not in types:
+                        raise Invalid(
+                            _msg(msg, 'upload.type', 'file type not allowed')
+                        )
+            lines += chunk.count(b'\n')
+            if max_lines is not None and lines > max_lines:
+                raise Invalid(_msg(msg, 'upload.lines', 'too many lines'))
+            last = chunk[-1:]
+            if hasher is not None:
+                hasher.update(chunk)
+            if sink is not None:
+                if content_type is None and types is not None:
+                    held.append(bytes(chunk))
+                    continue
+                for c in held:
+                    sink(c)
+                del held[:]
+                sink(chunk)
+        if content_type is None:
+            content_type = _sniff(head)
+            if types is not None and content_type not in types:
+                raise Invalid(
+                    _msg(msg, 'upload.type', 'file type not allowed')
+                )
+        for c in held:
+            sink(c)
+        if size and last != b'\n':
+            # the last line has no newline of its own
+            lines += 1
+            if max_lines is not None and lines > max_lines:
+                raise Invalid(_msg(msg, 'upload.lines', 'too many lines'))
+        hexdigest = hasher.hexdigest() if hasher is not None else None
+        if checksum is not None and hexdigest != checksum.lower():
+            raise Invalid(_msg(msg, 'upload.checksum', 'checksum mismatch'))
+        return FileInfo(size, content_type, hexdigest, lines)
+
+    f.blocking = True
     return f
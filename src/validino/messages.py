@@ -0,0 +1,91 @@
+# -*- coding: utf-8 -*-
+"""
+Localized error messages.
+
+A Catalog holds a table of messages for each locale, keyed by the
+same message keys that the msg argument of validators accepts
+('notempty', 'maxlen', 'schema.error' and so on):
+
+>>> import validino as V
+>>> catalog = V.Catalog({
+...     'fr': {'notempty': 'Une valeur est requise'},
+...     'fr_CA': {'maxlen': 'Trop long'}})
+>>> s = V.Schema(dict(name=V.not_empty()), messages=catalog)
+>>> s(dict(name='Jacques'), dict(locale='fr_CA'))
+{'name': 'Jacques'}
+
+The Schema activates the table for the locale named in its context
+for the duration of the call.  Messages passed explicitly to a
+validator take precedence over the catalog, and the validator's
+default message is used for keys the catalog lacks.
+"""
+
+import contextlib
+import contextvars
+
+__all__ = ['Catalog']
+
+# the message table of the active locale, consulted by _msg()
+_active = contextvars.ContextVar('validino.messages', default=None)
+
+
+class Catalog(object):
+    """
+    a set of message tables keyed by locale.  A locale such as
+    'fr_CA' falls back to 'fr' for keys it lacks, and every locale
+    falls back to the default locale, if one is given.  The
+    fallbacks are merged when the catalog is built, so looking up a
+    message is a single dictionary lookup whatever the number of
+    locales.
+    """
+
+    def __init__(self, tables, default=None):
+        self.default = default
+        base = dict(tables.get(default, ()))
+        self._tables = {}
+        for locale in tables:
+            table = base.copy()
+            language = locale.split('_')[0]
+            if language != locale:
+                table.update(tables.get(language, ()))
+            table.update(tables[locale])
+            self._tables[locale] = table
+        self._tables[None] = base or None
+
+    def table(self, locale):
+        """
+        returns the merged message table for the locale.
+        """
+        try:
+            return self._tables[locale]
+        except KeyError:
+            return self._tables.get(
+                locale.split('_')[0], self._tables[None]
+            )
+
+    def activate(self, locale):
+        """
+        returns a context manager that makes the locale's messages
+        active, for validators used outside a Schema.
+        """
+        return _activated(self.table(locale))
+
+    def for_context(self, context):
+        """
+        returns a context manager that makes the messages for the
+        locale named in a validation context active.
+        """
+        try:
+            locale = context.get('locale')
+        except AttributeError:
+            locale = None
+        return _activated(self.table(locale))
+
+
+@contextlib.contextmanager
+def _activated(table):
+    token = _active.set(table)
+    try:
+        yield table
+    finally:
+        _active.reset(token)
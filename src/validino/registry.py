@@ -0,0 +1,185 @@
+# -*- coding: utf-8 -*-
+"""
+A registry of schemas built on demand, for applications with a
+schema per tenant (or per form, or per API version):
+
+>>> import validino as V
+>>> def build(tenant):
+...     return V.Schema(dict(name=(V.strip, V.not_empty())))
+>>> schemas = V.SchemaRegistry(build, maxsize=1000)
+>>> schemas['acme'](dict(name=' Wile E. '))
+{'name': 'Wile E.'}
+
+Schemas are built the first time they are asked for and the least
+recently used are dropped when there are more than maxsize of them,
+or if cost and max_cost are given, when their total cost exceeds
+max_cost.  Schemas built with the same subvalidators and options are
+shared between keys, and the stateless validators of validino.base
+are shared between schemas already, so tenants with the same fields
+cost little more than one.
+"""
+
+import collections
+import threading
+import time
+import weakref
+
+from validino.base import Schema
+
+__all__ = ['SchemaRegistry']
+
+
+def _schema_key(schema):
+    """
+    returns a key identifying a schema by its subvalidators and
+    options, or None if they can't be hashed.
+    """
+    key = (
+        schema.__class__,
+        tuple(schema.subvalidators.items()),
+        tuple(sorted(
+            (k, v) for k, v in schema.__dict__.items()
+            if k not in ('subvalidators', 'limits') and not k.startswith('_')
+        )),
+        tuple(sorted(schema.limits.items())),
+    )
+    try:
+        hash(key)
+    except TypeError:
+        return None
+    return key
+
+
+class SchemaRegistry(object):
+    """
+    builds schemas with build(key) when they are first asked for, and
+    keeps at most maxsize of them (None for no limit), dropping the
+    least recently used.  If cost is given, it is called with each
+    schema built, and schemas are also dropped while the total cost
+    exceeds max_cost.
+    """
+
+    def __init__(self, build, maxsize=1024, cost=None, max_cost=None):
+        self.build = build
+        self.maxsize = maxsize
+        self.cost = cost
+        self.max_cost = max_cost
+        self._schemas = collections.OrderedDict()
+        self._shared = weakref.WeakValueDictionary()
+        self._lock = threading.Lock()
+        self._total_cost = 0
+        self.hits = 0
+        self.misses = 0
+        self.evictions = 0
+        self.deduplicated = 0
+        self.build_time = 0.0
+
+    def __getitem__(self, key):
+        with self._lock:
+            try:
+                schema, cost = self._schemas[key]
+            except KeyError:
+                self.misses += 1
+            else:
+                self.hits += 1
+                self._schemas.move_to_end(key)
+                return schema
+        # build outside the lock, so that one slow build doesn't hold
+        # up requests for schemas already built
+        start = time.perf_counter()
+        schema = self.build(key)
+        elapsed = time.perf_counter() - start
+        with self._lock:
+            self.build_time += elapsed
+            schema = self._share(schema)
+            if key in self._schemas:
+                # built by another thread meanwhile
+                return self._schemas[key][0]
+            cost = self.cost(schema) if self.cost is not None else 0
+            self._schemas[key] = (schema, cost)
+            self._total_cost += cost
+            self._evict()
+        return schema
+
+    def get(self, key, default=None):
+        """
+        returns the schema built for key, or default if there isn't
+        one, without building it.
+        """
+        with self._lock:
+            try:
+                schema, cost = self._schemas[key]
+            except KeyError:
+                return default
+            self.hits += 1
+            self._schemas.move_to_end(key)
+            return schema
+
+    def _share(self, schema):
+        """
+        returns an identical schema built earlier, if there is one.
+        """
+        if not isinstance(schema, Schema):
+            return schema
+        key = _schema_key(schema)
+        if key is None:
+            return schema
+        shared = self._shared.get(key)
+        if shared is not None:
+            self.deduplicated += 1
+            return shared
+        self._shared[key] = schema
+        return schema
+
+    def _evict(self):
+        schemas = self._schemas
+        while schemas and (
+            (self.maxsize is not None and len(schemas) > self.maxsize) or
+            (self.max_cost is not None and self._total_cost > self.max_cost)
+        ):
+            key, (schema, cost) = schemas.popitem(last=False)
+            self._total_cost -= cost
+            self.evictions += 1
+
+    def invalidate(self, key):
+        """
+        drops the schema for key, so that it is built again when it is
+        next asked for.
+        """
+        with self._lock:
+            try:
+                schema, cost = self._schemas.pop(key)
+            except KeyError:
+                return
+            self._total_cost -= cost
+
+    def clear(self):
+        with self._lock:
+            self._schemas.clear()
+            self._total_cost = 0
+
+    def __contains__(self, key):
+        return key in self._schemas
+
+    def __len__(self):
+        return len(self._schemas)
+
+    def stats(self):
+        """
+        returns the numbers of hits, misses, evictions and schemas
+        shared with another key, the total and mean build times in
+        seconds, and the number and total cost of schemas held.
+        """
+        with self._lock:
+            return dict(
+                hits=self.hits,
+                misses=self.misses,
+                evictions=self.evictions,
+                deduplicated=self.deduplicated,
+                build_time=self.build_time,
+                mean_build_time=(
+                    self.build_time / self.misses if self.misses else 0.0
+                ),
+                size=len(self._schemas),
+                cost=self._total_cost,
+            )
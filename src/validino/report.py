@@ -0,0 +1,192 @@
+# -*- coding: utf-8 -*-
+"""
+Compact error reports for validating large batches of records.
+
+When many records fail in the same way, keeping an Invalid for each
+of them costs memory in proportion to the number of failures.  An
+ErrorCollector keeps each distinct set of errors once, with the runs
+of row numbers it occurred on:
+
+>>> import validino as V
+>>> schema = V.Schema(dict(age=V.to_integer(msg='not a number')))
+>>> errors = V.ErrorCollector()
+>>> rows = [dict(age='1'), dict(age='x'), dict(age='y'), dict(age='2')]
+>>> [row for i, row in errors.validate(schema, rows)]
+[{'age': 1}, {'age': 2}]
+>>> errors.failed, len(errors)
+(2, 1)
+
+so memory grows with the number of distinct errors and the runs of
+failing rows, rather than with the number of failing rows.
+"""
+
+import collections
+import json
+
+from validino.base import Invalid
+
+__all__ = ['ErrorCollector']
+
+
+class _Fields(tuple):
+    """
+    the sorted (field, errors) pairs of a frozen dict of errors.
+    """
+
+
+def _freeze(value):
+    """
+    returns the unpacked errors as a hashable value: dicts, as those
+    of nested validators, become _Fields and lists become tuples.
+    """
+    if isinstance(value, dict):
+        return _Fields(sorted(
+            ((k, _freeze(v)) for k, v in value.items()),
+            key=lambda item: repr(item[0])
+        ))
+    if isinstance(value, list):
+        return tuple(_freeze(v) for v in value)
+    return value
+
+
+def _thaw(value):
+    if isinstance(value, _Fields):
+        return dict((k, _thaw(v)) for k, v in value)
+    if isinstance(value, tuple):
+        return [_thaw(v) for v in value]
+    return value
+
+
+def _messages(message):
+    """
+    yields each of the messages in frozen errors, however deeply
+    nested.
+    """
+    if isinstance(message, _Fields):
+        for k, v in message:
+            yield from _messages(v)
+    elif isinstance(message, tuple):
+        for m in message:
+            yield from _messages(m)
+    else:
+        yield message
+
+
+def _json_name(key):
+    """
+    returns a dict key json.dumps() accepts: the fields of a plural
+    key, as a Schema keys the errors of only_one_of(), are joined
+    with commas, and other keys json can't take are repr()ed.
+    """
+    if isinstance(key, tuple):
+        return ','.join(map(str, key))
+    if key is None or isinstance(key, (str, int, float)):
+        return key
+    return repr(key)
+
+
+def _jsonable(value):
+    if isinstance(value, dict):
+        return dict((_json_name(k), _jsonable(v)) for k, v in value.items())
+    if isinstance(value, list):
+        return [_jsonable(v) for v in value]
+    return value
+
+
+class ErrorCollector(object):
+    """
+    collects the errors of a batch of records by row number.  Each
+    distinct set of unpacked errors is stored once, with the runs of
+    consecutive rows it occurred on as [start, stop) ranges.
+    """
+
+    def __init__(self):
+        # the runs of rows for each distinct set of errors
+        self._runs = {}
+        self._fields = collections.Counter()
+        self._messages = collections.Counter()
+        self.failed = 0
+
+    def add(self, row, error):
+        """
+        records the errors (an Invalid or its unpacked errors) of row.
+        """
+        if isinstance(error, Invalid):
+            error = error.unpack_errors()
+        shape = _freeze(error)
+        runs = self._runs.get(shape)
+        if runs is None:
+            self._runs[shape] = [[row, row + 1]]
+        elif runs[-1][1] == row:
+            runs[-1][1] = row + 1
+        else:
+            runs.append([row, row + 1])
+        self.failed += 1
+        for field, message in shape:
+            self._fields[field] += 1
+            for m in _messages(message):
+                self._messages[m] += 1
+
+    def validate(self, validator, records, context=None, start=0):
+        """
+        validates each of the records, recording the errors of those
+        that fail, and yields (row, result) for those that pass.  Rows
+        are numbered from start.
+        """
+        for row, record in enumerate(records, start):
+            try:
+                result = validator(record, context)
+            except Invalid as e:
+                self.add(row, e)
+            else:
+                yield row, result
+
+    def __len__(self):
+        return len(self._runs)
+
+    def by_field(self):
+        """
+        returns the number of failing rows for each field (None for
+        errors not tied to a field).
+        """
+        return dict(self._fields)
+
+    def by_message(self):
+        """
+        returns the number of times each error message occurred.
+        """
+        return dict(self._messages)
+
+    def report(self):
+        """
+        yields a dict for each distinct set of errors, most frequent
+        first, with the errors, the number of rows they occurred on,
+        and the [start, stop) ranges of those rows.
+        """
+        counts = [
+            (sum(stop - start for start, stop in runs), shape)
+            for shape, runs in self._runs.items()
+        ]
+        counts.sort(key=lambda item: -item[0])
+        for count, shape in counts:
+            yield dict(
+                errors=_thaw(shape),
+                count=count,
+                rows=self._runs[shape],
+            )
+
+    def write(self, fp):
+        """
+        writes the report to a text file as JSON lines, starting with
+        a summary line.  The names of plural keys are joined with
+        commas.
+        """
+        summary = dict(
+            failed=self.failed,
+            distinct=len(self),
+            fields=self.by_field(),
+            messages=self.by_message(),
+        )
+        fp.write(json.dumps(_jsonable(dict(summary=summary))) + '\n')
+        for entry in self.report():
+            fp.write(json.dumps(_jsonable(entry)) + '\n')
@@ -0,0 +1,115 @@
+# -*- coding: utf-8 -*-
+"""
+Sampled validation of trusted, high-volume streams.
+"""
+
+import collections
+import random
+import zlib
+
+from validino.base import Invalid
+
+__all__ = ['Sampler']
+
+
+class Sampler(object):
+    """
+    validates a fraction of the records passed to it with a
+    validator (typically a Schema), and passes the rest through
+    untouched.
+
+    If key is given, the decision is deterministic: key may be the
+    name of a field or a function of the record, and records whose
+    key hashes below the rate are sampled, so the same records are
+    sampled on every run and in every process.  Otherwise records are
+    sampled at random.
+
+    While sampling, every record is returned as it was passed in,
+    sampled or not, so that sampling never changes the output of the
+    stream; sampled records are validated only to count their
+    failures, overall and per field, which are reported by stats().
+    If threshold is given, the sampler switches to validating every
+    record once the error rate of the sampled records reaches it,
+    after at least min_samples records have been sampled.  From then
+    on records are validated as usual: the converted record is
+    returned, or Invalid is raised.
+    """
+
+    def __init__(
+        self,
+        validator,
+        rate=0.01,
+        key=None,
+        threshold=None,
+        min_samples=100,
+        random=random.random,
+    ):
+        self.validator = validator
+        self.rate = rate
+        self.key = key
+        self.threshold = threshold
+        self.min_samples = min_samples
+        self.random = random
+        self.reset()
+
+    def reset(self):
+        """
+        clears the statistics and returns to sampling.
+        """
+        self.seen = 0
+        self.sampled = 0
+        self.failed = 0
+        self.field_failures = collections.Counter()
+        self.full = False
+
+    def _wanted(self, record):
+        if self.key is None:
+            return self.random() < self.rate
+        if callable(self.key):
+            k = self.key(record)
+        else:
+            k = record.get(self.key)
+        if not isinstance(k, bytes):
+            k = str(k).encode('utf8')
+        return zlib.crc32(k) < self.rate * 0x100000000
+
+    def __call__(self, record, context=None):
+        self.seen += 1
+        full = self.full
+        if not (full or self._wanted(record)):
+            return record
+        self.sampled += 1
+        try:
+            result = self.validator(record, context)
+        except Invalid as e:
+            self.failed += 1
+            errors = e.unpack_errors()
+            self.field_failures.update(k for k in errors if k is not None)
+            if full:
+                raise
+        else:
+            if full:
+                return result
+        finally:
+            if (
+                self.threshold is not None and
+                self.sampled >= self.min_samples and
+                self.failed >= self.threshold * self.sampled
+            ):
+                self.full = True
+        return record
+
+    def stats(self):
+        """
+        returns the counts of records seen, sampled and failed, the
+        error rate of the sampled records, the failures per field, and
+        whether every record is now being validated.
+        """
+        return dict(
+            seen=self.seen,
+            sampled=self.sampled,
+            failed=self.failed,
+            error_rate=self.failed / self.sampled if self.sampled else 0.0,
+            field_failures=dict(self.field_failures),
+            full=self.full,
+        )
@@ -0,0 +1,121 @@
+# -*- coding: utf-8 -*-
+"""
+Incremental revalidation of documents that change a little at a time.
+"""
+
+import copy
+
+from validino.base import Invalid
+
+__all__ = ['Session']
+
+_missing = object()
+
+
+def _fields(k):
+    if isinstance(k, (list, tuple)):
+        return k
+    return (k,)
+
+
+class Session(object):
+    """
+    wraps a Schema for repeated validation of successive versions of
+    the same document, such as a form that is re-submitted after
+    every keystroke.
+
+    The session remembers the previous input, result and errors.  On
+    each call it works out which fields changed and re-runs only the
+    subvalidators that read them -- directly, or through a plural key
+    such as ('email', 'email_confirm') -- reusing the remembered
+    outcome of every other subvalidator.  The result and errors are
+    the same as those of a full revalidation.
+
+    Changes are detected by comparing the new input with a shallow
+    copy of the previous one, so values must not be mutated in place
+    between calls.  A change in the context forces a full
+    revalidation.
+    """
+
+    def __init__(self, schema):
+        self.schema = schema
+        self.reset()
+
+    def reset(self):
+        """
+        forgets the previous input, so that the next call performs a
+        full validation.
+        """
+        self.data = None
+        self.result = None
+        self.errors = None
+        self._context = None
+        self._outcomes = {}
+
+    def _changed(self, data, context):
+        if self.data is None or context != self._context:
+            return None
+        previous = self.data
+        changed = set()
+        for k in set(data).union(previous):
+            if data.get(k, _missing) != previous.get(k, _missing):
+                changed.add(k)
+        return changed
+
+    def __call__(self, data, context=None):
+        if not context:
+            context = dict()
+        if self.schema.messages is None:
+            return self._validate(data, context)
+        with self.schema.messages.for_context(context):
+            return self._validate(data, context)
+
+    def _validate(self, data, context):
+        schema = self.schema
+        schema._check_keys(data)
+        changed = self._changed(data, context)
+        snapshot = dict(data)
+        if not schema.filter_extra:
+            result = data
+        else:
+            result = {}
+        exceptions = {}
+        outcomes = {}
+
+        for stage in schema._stages():
+            if schema.filter_missing:
+                stage = [k for k in stage if k in data]
+            rerun = []
+            for k in stage:
+                if k not in self._outcomes or changed is None or (
+                    changed.intersection(_fields(k))
+                ):
+                    rerun.append(k)
+                else:
+                    outcomes[k] = self._outcomes[k]
+            ran = schema._run_stage(rerun, data, result, context)
+            for k, outcome in zip(rerun, ran):
+                outcomes[k] = outcome
+                if changed is not None:
+                    # converted values may differ now, so anything
+                    # downstream reading these fields must run again
+                    changed.update(_fields(k))
+            for k in stage:
+                values, error = outcomes[k]
+                if error:
+                    name, errors = error
+                    exceptions[name] = errors
+                else:
+                    result.update(values)
+
+        self.data = snapshot
+        self._context = copy.copy(context)
+        self._outcomes = outcomes
+        try:
+            self.result = schema._finish(result, exceptions)
+        except Invalid as e:
+            self.result = None
+            self.errors = e.unpack_errors()
+            raise
+        self.errors = None
+        return self.result
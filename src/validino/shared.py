@@ -0,0 +1,273 @@
+# -*- coding: utf-8 -*-
+"""
+Read-only lookup tables shared between processes.
+
+A dict or set used by translate() or belongs() lives in the private
+heap of each process, and since merely reading an object updates its
+reference count, pre-forked workers soon hold a copy each.  A
+SharedTable keeps its entries in a single block of shared memory (or
+a memory-mapped file) in a hash table that is read in place, so each
+worker pays only for the handful of objects describing the block:
+
+>>> import validino as V
+>>> from validino.shared import SharedTable
+>>> codes = SharedTable.create({'GB': 'United Kingdom', 'FR': 'France'})
+>>> v = V.translate(codes)
+>>> v('FR')
+'France'
+
+Build the table in the master process before the workers fork; a
+table pickled to another process (as when it is part of a Schema)
+attaches to the same block.  Keys may be str, bytes or int, and
+values anything picklable; a set, or any other iterable of keys, is
+stored with None as every value.  The process that created a table
+in shared memory should call unlink() when the table is no longer
+needed.
+"""
+
+import collections.abc
+import hashlib
+import mmap
+import os
+import pickle
+import struct
+import tempfile
+
+try:
+    from multiprocessing import resource_tracker, shared_memory
+except ImportError:  # pragma: no cover
+    resource_tracker = shared_memory = None
+
+__all__ = ['SharedTable']
+
+# magic, number of slots, number of entries
+_HEADER = struct.Struct('<4sQQ')
+
+_MAGIC = b'VSHT'
+
+# hash of the key, offset of its record (0 for an empty slot)
+_SLOT = struct.Struct('<QQ')
+
+# type tag and length of the key, then the key
+_KEY = struct.Struct('<cI')
+
+# length of the pickled value, then the value
+_VALUE = struct.Struct('<I')
+
+_NONE = pickle.dumps(None)
+
+
+def _encode(key):
+    """
+    returns the tag and bytes a key is stored under, or None if keys
+    of its type can't be stored.  Integers (including bools) are
+    stored by value, so that True finds 1 as it would in a dict.
+    """
+    if isinstance(key, str):
+        return b's', key.encode('utf8', 'surrogatepass')
+    if isinstance(key, bytes):
+        return b'b', key
+    if isinstance(key, int):
+        return b'i', b'%d' % key
+    return None
+
+
+def _decode(tag, data):
+    if tag == b's':
+        return data.decode('utf8', 'surrogatepass')
+    if tag == b'b':
+        return data
+    return int(data)
+
+
+def _hash(tag, data):
+    return int.from_bytes(
+        hashlib.blake2b(tag + data, digest_size=8).digest(), 'little')
+
+
+def _serialize(items):
+    """
+    returns the bytes of a table holding items, an iterable of
+    (key, value) pairs.
+    """
+    heap = bytearray()
+    entries = []
+    seen = set()
+    for key, value in items:
+        encoded = _encode(key)
+        if encoded is None:
+            raise TypeError("can't store key %r in a SharedTable" % (key,))
+        if encoded in seen:
+            continue
+        seen.add(encoded)
+        tag, data = encoded
+        pickled = _NONE if value is None else pickle.dumps(value, -1)
+        entries.append((_hash(tag, data), len(heap)))
+        heap += _KEY.pack(tag, len(data))
+        heap += data
+        heap += _VALUE.pack(len(pickled))
+        heap += pickled
+    nslots = 8
+    while nslots < len(entries) * 2:
+        nslots *= 2
+    mask = nslots - 1
+    base = _HEADER.size + nslots * _SLOT.size
+    table = bytearray(base)
+    _HEADER.pack_into(table, 0, _MAGIC, nslots, len(entries))
+    for h, offset in entries:
+        i = h & mask
+        while _SLOT.unpack_from(table, _HEADER.size + i * _SLOT.size)[1]:
+            i = (i + 1) & mask
+        _SLOT.pack_into(table, _HEADER.size + i * _SLOT.size, h, base + offset)
+    return bytes(table + heap)
+
+
+def _pairs(source):
+    if isinstance(source, collections.abc.Mapping):
+        return source.items()
+    return ((key, None) for key in source)
+
+
+class SharedTable(collections.abc.Mapping):
+    """
+    a read-only mapping held in shared memory or a memory-mapped
+    file.  Use create() or attach() rather than building one
+    directly.
+    """
+
+    def __init__(self, buf, name=None, path=None, owner=None):
+        magic, nslots, count = _HEADER.unpack_from(buf)
+        if magic != _MAGIC:
+            raise ValueError("not a SharedTable")
+        self._buf = buf
+        self._mask = nslots - 1
+        self._count = count
+        self._owner = owner
+        self.name = name
+        self.path = path
+
+    @classmethod
+    def create(cls, source, path=None):
+        """
+        builds a table from a mapping, or an iterable of keys, in a
+        new block of shared memory, or if path is given, in a file
+        that is then mapped.
+        """
+        data = _serialize(_pairs(source))
+        if path is not None:
+            fd, tmp = tempfile.mkstemp(
+                dir=os.path.dirname(os.path.abspath(path)))
+            try:
+                with os.fdopen(fd, 'wb') as f:
+                    f.write(data)
+                os.replace(tmp, path)
+            except BaseException:
+                os.unlink(tmp)
+                raise
+            return cls.open(path)
+        shm = shared_memory.SharedMemory(create=True, size=len(data))
+        shm.buf[:len(data)] = data
+        return cls(shm.buf, name=shm.name, owner=shm)
+
+    @classmethod
+    def attach(cls, name):
+        """
+        attaches to a table another process created in shared memory.
+        """
+        shm = shared_memory.SharedMemory(name=name)
+        # only the creator may unlink the block; before Python 3.13 the
+        # resource tracker would unlink it when this process exits
+        try:
+            resource_tracker.unregister(shm._name, 'shared_memory')
+        except Exception:
+            pass
+        return cls(shm.buf, name=name, owner=shm)
+
+    @classmethod
+    def open(cls, path):
+        """
+        maps a table from a file written by create().
+        """
+        with open(path, 'rb') as f:
+            mm = mmap.mmap(f.fileno(), 0, access=mmap.ACCESS_READ)
+        return cls(memoryview(mm), path=path, owner=mm)
+
+    def _find(self, key):
+        """
+        returns the offset of the value stored under key, or None.
+        """
+        encoded = _encode(key)
+        if encoded is None:
+            return None
+        tag, data = encoded
+        h = _hash(tag, data)
+        buf = self._buf
+        mask = self._mask
+        i = h & mask
+        while True:
+            slot_hash, offset = _SLOT.unpack_from(
+                buf, _HEADER.size + i * _SLOT.size)
+            if not offset:
+                return None
+            if slot_hash == h:
+                slot_tag, length = _KEY.unpack_from(buf, offset)
+                start = offset + _KEY.size
+                if slot_tag == tag and buf[start:start + length] == data:
+                    return start + length
+            i = (i + 1) & mask
+
+    def __getitem__(self, key):
+        offset = self._find(key)
+        if offset is None:
+            raise KeyError(key)
+        length, = _VALUE.unpack_from(self._buf, offset)
+        start = offset + _VALUE.size
+        return pickle.loads(self._buf[start:start + length])
+
+    def __contains__(self, key):
+        return self._find(key) is not None
+
+    def __len__(self):
+        return self._count
+
+    def __iter__(self):
+        buf = self._buf
+        offset = _HEADER.size + (self._mask + 1) * _SLOT.size
+        for i in range(self._count):
+            tag, length = _KEY.unpack_from(buf, offset)
+            start = offset + _KEY.size
+            yield _decode(tag, bytes(buf[start:start + length]))
+            offset = start + length
+            length, = _VALUE.unpack_from(buf, offset)
+            offset += _VALUE.size + length
+
+    def close(self):
+        """
+        releases this process's view of the table.
+        """
+        if self._owner is not None:
+            self._buf.release()
+            self._owner.close()
+            self._owner = None
+
+    def unlink(self):
+        """
+        frees a table held in shared memory, once every process has
+        finished with it.  Call it only in the process that created it.
+        """
+        if self.name is not None:
+            shm = self._owner or shared_memory.SharedMemory(name=self.name)
+            self.close()
+            # attach() in this process, or in one forked from it, may
+            # have removed the block from the resource tracker, which
+            # complains if unlink() unregisters it a second time
+            try:
+                resource_tracker.register(shm._name, 'shared_memory')
+            except Exception:
+                pass
+            shm.unlink()
+
+    def __reduce__(self):
+        if self.path is not None:
+            return (SharedTable.open, (self.path,))
+        return (SharedTable.attach, (self.name,))
@@ -0,0 +1,68 @@
+# -*- coding: utf-8 -*-
+
+import py
+
+import validino as V
+from validino import artifact, base
+from util import assert_invalid
+
+
+def make_schema():
+    return V.Schema(
+        dict(
+            username=(
+                V.strip,
+                V.regex('[a-z][a-z0-9]+$', 'invalid username'),
+                V.clamp_length(max=16, msg='too long')),
+            gender=V.either(V.empty(), V.belongs(frozenset(('m', 'f')))),
+            age=lambda value, context=None: int(value),
+            home=V.ip(),
+            address=V.nested(zip=V.to_integer()),
+            ),
+        "there were errors")
+
+
+def test_round_trip(tmpdir):
+    path = str(tmpdir.join('schema.vart'))
+    artifact.save(make_schema(), path, version='1')
+    schema = artifact.load(path, version='1')
+    data = dict(
+        username=' bob ', gender='m', age='4', home='10.0.0.1',
+        address=dict(zip='1'))
+    assert schema(data) == make_schema()(data)
+    assert schema.subvalidators['gender'].__name__ == 'either'
+    assert base._is_pure(schema.subvalidators['gender'])
+    assert not base._is_pure(schema.subvalidators['age'])
+    assert base._walk_frame(schema.subvalidators['address']) is not None
+    assert schema.subvalidators['gender'].__doc__ == V.either.__doc__
+    assert_invalid(
+        lambda: schema(dict(data, username='Bob')),
+        {None: "there were errors", 'username': 'invalid username'})
+
+
+def test_shared_code():
+    validators = [V.not_empty(msg=str(i)) for i in range(50)]
+    one = artifact.dumps(validators[:1])
+    many = artifact.dumps(validators)
+    assert len(many) < len(one) * 10
+    loaded = artifact.loads(many)
+    assert_invalid(lambda: loaded[7](''), {None: '7'})
+
+
+def test_validator_set():
+    schemas = artifact.loads(artifact.dumps(
+        dict(signup=make_schema(), others=[make_schema()])))
+    assert schemas['signup']._plan is not None
+    assert schemas['others'][0]._plan is not None
+    data = dict(
+        username='bob', gender='f', age='4', home='10.0.0.1',
+        address=dict(zip='1'))
+    assert schemas['others'][0](data) == make_schema()(data)
+
+
+def test_stale_artifact():
+    data = artifact.dumps(make_schema(), version='1')
+    with py.test.raises(artifact.StaleArtifact):
+        artifact.loads(data, version='2')
+    with py.test.raises(artifact.StaleArtifact):
+        artifact.loads(data)
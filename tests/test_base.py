@@ -1,10 +1,11 @@
 # -*- coding: utf-8 -*-
 
-import uuid, datetime, functools
+import uuid, datetime, decimal, functools, gc, json, sys
 
 import py
 
 import validino as V
+from validino import base
 from validino.util import partial
 from util import assert_invalid
 
@@ -229,6 +230,139 @@ def test_nested_many_fail_nested_errors():
     assert expected == errors
 
 
+def deep_document(depth, leaf):
+    validator = V.to_integer()
+    data = leaf
+    for i in range(depth):
+        validator = V.nested(
+            name=V.to_string(),
+            child=(V.check(V.not_empty()), validator))
+        data = dict(name=str(i), child=data)
+    return validator, data
+
+
+def test_nested_deep():
+    validator, data = deep_document(3000, '42')
+    result = validator(data)
+    for i in range(3000):
+        assert result['name'] == str(2999 - i)
+        result = result['child']
+    assert result == 42
+
+    validator, data = deep_document(3000, 'x')
+    with py.test.raises(V.Invalid) as e:
+        validator(data)
+    errors = e.value.unpack_errors()
+    for i in range(3000):
+        errors = errors['child']
+    assert errors == "not an integer"
+
+
+def test_limit_depth():
+    validator, data = deep_document(10, '1')
+    v = V.limit_depth(validator, 10)
+    assert v.__name__ == "limit_depth"
+    assert v(data) == validator(data)
+    v = V.limit_depth(validator, 3, msg="too deep")
+    with py.test.raises(V.Invalid) as e:
+        v(data)
+    assert e.value.unpack_errors() == {
+        'child': {'child': {'child': "too deep"}}}
+
+    v = V.limit_depth(V.nested_many(V.nested_many(V.to_integer())), 1)
+    with py.test.raises(V.Invalid) as e:
+        v(dict(a=dict(b='1')))
+    assert e.value.unpack_errors() == {'a': "too deeply nested"}
+
+
+def test_recursive():
+    tree = V.recursive()
+    assert tree.__name__ == "recursive"
+    tree.define(V.nested(name=V.to_integer(), children=V.nested_many(tree)))
+    data = dict(name='1', children=dict(x=dict(name='2', children=dict(
+        y=dict(name='3', children=dict(z=dict(name='q')))))))
+    with py.test.raises(V.Invalid) as e:
+        tree(data)
+    assert e.value.unpack_errors() == {'children': {'x': {'children': {
+        'y': {'children': {'z': {
+            'name': 'not an integer',
+            'children': "key 'children' is missing"}}}}}}}
+    with py.test.raises(V.Invalid) as e:
+        V.limit_depth(tree, 2)(data)
+    assert e.value.unpack_errors() == {'children': {'x': 'too deeply nested'}}
+
+    # the depth is carried across the reference, so documents nested
+    # deeper than the recursion limit don't overflow the stack
+    depth = sys.getrecursionlimit() * 2
+    data = dict(name='q')
+    for i in range(depth):
+        data = dict(name=str(i), children=dict(x=data))
+    with py.test.raises(V.Invalid) as e:
+        tree(data)
+    errors = e.value.unpack_errors()
+    for i in range(depth):
+        errors = errors['children']['x']
+    assert errors['name'] == 'not an integer'
+
+    with py.test.raises(V.Invalid) as e:
+        V.limit_depth(tree, 10)(data)
+    errors = e.value.unpack_errors()
+    for i in range(5):
+        errors = errors['children']['x']
+    assert errors == "too deeply nested"
+
+    with py.test.raises(ValueError):
+        V.recursive()(data)
+
+
+def test_nested_wrapped_validators():
+    calls = []
+
+    def logged(validator):
+        @functools.wraps(validator)
+        def f(value, context=None):
+            calls.append(value)
+            return validator(value, context)
+        return f
+
+    inner = logged(V.nested(b=V.to_integer()))
+    v = V.nested(a=inner, c=V.nested_many(logged(V.all_of(V.to_integer()))))
+    assert v(dict(a=dict(b='1'), c=dict(x='2'))) == dict(a=dict(b=1),
+                                                       c=dict(x=2))
+    assert calls == [dict(b='1'), '2']
+    assert V.Schema(dict(a=inner))(dict(a=dict(b='3'))) == dict(a=dict(b=3))
+    assert calls[-1] == dict(b='3')
+
+
+def test_stream_many():
+    v = V.stream_many(V.to_integer(msg="not a number"))
+    assert v.__name__ == "stream_many"
+    results = v(dict(a="1", b="two", c=3.0))
+    assert next(results) == ('a', 1)
+    key, error = next(results)
+    assert key == 'b'
+    assert error.unpack_errors() == {None: "not a number"}
+    assert list(results) == [('c', 3)]
+
+    pairs = (('k%d' % i, str(i)) for i in range(100000))
+    total = sum(result for key, result in v(pairs))
+    assert total == sum(range(100000))
+
+
+def test_stream_list():
+    v = V.stream_list(V.is_integer(), max_errors=2, msg="give up")
+    assert v.__name__ == "stream_list"
+    values = iter([1, 'a', 2, 'b', 'c', 3])
+    results = v(values)
+    assert [k for k, result in [next(results) for i in range(4)]] == [
+        0, 1, 2, 3]
+    with py.test.raises(V.Invalid) as e:
+        next(results)
+    assert e.value.unpack_errors() == {None: "give up"}
+    # the rest of the input is never read
+    assert list(values) == [3]
+
+
 def test_only_one_of():
     v = V.only_one_of(msg="Please only choose one value")
     assert v.__name__ == "only_one_of"
@@ -495,6 +629,35 @@ def test_either():
     assert v('foo', context=['foo']) == 'foo'
 
 
+def test_either_adaptive():
+    v = V.either(
+        V.empty(msg='empty'), V.equal('other', msg='equal'),
+        V.to_integer(msg='integer'), adaptive=True, every=10)
+    assert v.__name__ == 'either'
+    assert base._is_pure(v)
+    for i in range(10):
+        assert v(str(i)) == i
+    stats = v.stats()
+    assert stats['calls'] == 10
+    assert stats['order'] == [2, 0, 1]
+    assert stats['branches'][2] == dict(tries=10, successes=10)
+    assert v('') == ''
+    assert v('other') == 'other'
+    assert v('7') == 7
+    assert v.stats()['branches'][2] == dict(tries=13, successes=11)
+    assert_invalid(lambda: v('x'), {None: 'integer'})
+
+    v = V.either(V.to_integer(msg='integer'), V.empty(msg='empty'),
+                 adaptive=True, every=1)
+    v('')
+    assert v.stats()['order'] == [1, 0]
+    assert_invalid(lambda: v('x'), {None: 'empty'})
+
+    v = V.either(adaptive=True)
+    assert_invalid(lambda: v('x'), {None: 'no validator to try'})
+    assert v.stats()['calls'] == 1
+
+
 def test_empty():
     v = V.empty(msg="scorch me")
     assert v.__name__ == "empty"
@@ -533,6 +696,35 @@ def test_is_integer():
         {None: msg})
 
 
+def test_uuid_forms():
+    v = V.uuid(msg='uuid')
+    guid = uuid.uuid4()
+    canonical = str(guid)
+    assert v(canonical.upper()) == canonical
+    assert v('{%s}' % canonical) == canonical
+    assert v('urn:uuid:' + guid.hex) == canonical
+    assert v(guid.bytes) == canonical
+    assert v(bytearray(guid.bytes)) == canonical
+    assert v(canonical.encode('ascii')) == canonical
+    for bad in (b'\xff' * 15, b'\xff' * 36, canonical + '0', 12):
+        assert_invalid(lambda: v(bad), {None: 'uuid'})
+
+    v = V.uuid(default=lambda: 'new')
+    assert v('') == 'new'
+    assert v(canonical) == canonical
+
+
+def test_uuids():
+    v = V.uuids(msg='uuid')
+    assert v.__name__ == 'uuids'
+    ids = [uuid.uuid4() for i in range(3)]
+    assert v([str(ids[0]), ids[1].bytes, ids[2]]) == [str(i) for i in ids]
+    assert v([]) == []
+    with py.test.raises(V.Invalid) as e:
+        v([str(ids[0]), 'hullo', ids[1], None])
+    assert e.value.unpack_errors() == {1: 'uuid', 3: 'uuid'}
+
+
 def test_to_integer():
     msg = "please enter an integer"
     v = V.to_integer(msg=msg)
@@ -621,6 +813,38 @@ def test_regex():
         {None: 'regex'})
 
 
+def test_regex_any():
+    v = V.regex_any([r'ORD-\d{6}$', r'(INV)-(\d+)$', r'[a-f0-9]{8}$'], 'regex')
+    assert v.__name__ == "regex_any"
+    assert v.combined
+    assert v('ORD-123456') == 'ORD-123456'
+    assert v('deadbeef') == 'deadbeef'
+    assert v.which('INV-9') == 1
+    assert v.which('deadbeef') == 2
+    assert v.which('ORD-1') is None
+    assert_invalid(
+        lambda: v('ORD-1'),
+        {None: 'regex'})
+    assert_invalid(
+        lambda: V.regex_any([])('x'),
+        {None: 'does not match pattern'})
+
+
+def test_regex_any_uncombinable():
+    v = V.regex_any([r'(a)\1$', r'(?i)b$', r'(?P<n>c)$', r'(?P<n>d)$'])
+    assert not v.combined
+    assert v.which('aa') == 0
+    assert v.which('B') == 1
+    assert v.which('d') == 3
+    assert v.which('ab') is None
+    v = V.regex_any([r'(?P<n>c)$', r'(?P<n>d)$'])
+    assert not v.combined
+    assert v.which('d') == 1
+    v = V.regex_any([b'\\x00+$', b'\\xff+$'])
+    assert v.combined
+    assert v.which(b'\xff\xff') == 1
+
+
 def test_regex_sub():
     v = V.regex_sub('shrubbery', 'potted plant')
     assert v.__name__ == "regex_sub"
@@ -731,6 +955,91 @@ def test_schema_4():
     assert errors == {None: 'flam'}
 
 
+def test_schema_plural_keys_run_last():
+    s = V.Schema({
+        ('foo', 'bar'): V.fields_equal(msg="flam"),
+        'foo': V.to_integer(),
+        'bar': V.to_integer()})
+    assert s(dict(foo='1', bar=1)) == dict(foo=1, bar=1)
+    assert s._stages() == [['foo', 'bar'], [('foo', 'bar')]]
+
+    s = V.Schema({
+        'a': V.to_integer(),
+        ('a', 'b'): V.fields_equal(),
+        ('c', 'd'): V.fields_equal(),
+        ('b', 'c'): V.fields_equal()})
+    assert s._stages() == [
+        ['a'], [('a', 'b'), ('c', 'd')], [('b', 'c')]]
+
+
+def test_schema_executor():
+    import threading
+    from concurrent.futures import ThreadPoolExecutor
+    barrier = threading.Barrier(2, timeout=5)
+
+    def lookup(value, context=None):
+        barrier.wait()
+        if value == 'missing':
+            raise V.Invalid("not found")
+        return value.upper()
+
+    s = V.Schema(
+        dict(
+            x=V.blocking(lookup),
+            y=(V.to_string(), V.blocking(lookup)),
+            z=V.to_integer(msg="not a number")),
+        executor=ThreadPoolExecutor(2))
+    assert s(dict(x='a', y='b', z='1')) == dict(x='A', y='B', z=1)
+    with py.test.raises(V.Invalid) as e:
+        s(dict(x='missing', y='b', z='one'))
+    assert e.value.unpack_errors() == {
+        None: "Problems were found in the submitted data.",
+        'x': "not found",
+        'z': "not a number"}
+    assert list(e.value.errors) == ['x', 'z', None]
+
+
+def test_guard():
+    data = dict(a='x' * 10, b=[1, 2, dict(c='\N{SNOWMAN}')])
+    assert V.guard(max_keys=3, max_bytes=16, max_depth=3, max_items=3)(
+        data) is data
+    assert_invalid(lambda: V.guard(max_keys=2)(data),
+                   {None: 'too many keys'})
+    assert_invalid(lambda: V.guard(max_bytes=15)(data),
+                   {None: 'too much data'})
+    assert_invalid(lambda: V.guard(max_depth=2)(data),
+                   {None: 'too deeply nested'})
+    assert_invalid(lambda: V.guard(max_items=2, msg=dict(max_items='no'))(
+        data), {None: 'no'})
+    assert_invalid(lambda: V.guard(max_bytes=10 ** 6)('x' * (10 ** 6 + 1)),
+                   {None: 'too much data'})
+
+    # a wide container is only walked until a limit is exceeded
+    seen = []
+
+    class Wide(list):
+        def __iter__(self):
+            for x in list.__iter__(self):
+                seen.append(x)
+                yield x
+
+    assert_invalid(lambda: V.guard(max_bytes=10)(Wide(['abcd'] * 1000)),
+                   {None: 'too much data'})
+    assert len(seen) == 3
+
+
+def test_schema_limits():
+    s = V.Schema(
+        dict(name=V.not_empty(), tags=V.is_list()),
+        msg=dict(max_keys='slow down'),
+        max_keys=10, max_items=5)
+    assert s(dict(name='a', tags=['b'])) == dict(name='a', tags=['b'])
+    assert_invalid(lambda: s(dict.fromkeys(map(str, range(1000)), 'x')),
+                   {None: 'slow down'})
+    assert_invalid(lambda: s(dict(name='a', tags=list(range(6)))),
+                   {None: 'too many items'})
+
+
 def test_filter_extra():
     s = V.Schema(
         dict(
@@ -823,6 +1132,191 @@ def test_excursion():
     assert data == set(['bar', 'foo'])
 
 
+def test_excursion_modes():
+    data = dict(names=['bob'])
+    v = V.excursion(V.is_scalar(), V.clamp_length(max=3))
+    assert base._is_pure(v)
+    assert v(data) is data
+
+    v = V.excursion(lambda x, context: x.pop('names'))
+    data = dict(names=['bob'])
+    result = v(data)
+    assert result == dict(names=['bob'])
+    assert result is not data
+    assert data == dict()
+
+    v = V.excursion(lambda x, context: x['names'].append('sally'), mode='deep')
+    data = dict(names=['bob'])
+    assert v(data) == dict(names=['bob'])
+    assert data == dict(names=['bob', 'sally'])
+
+    v = V.excursion(V.is_list(), mode='shallow')
+    data = [1, 2]
+    assert v(data) == data
+    assert v(data) is not data
+
+    with py.test.raises(ValueError):
+        V.excursion(V.is_scalar(), mode='sideways')
+
+    # a wrapper of a pure validator isn't pure itself
+    def appender(validator):
+        @functools.wraps(validator)
+        def f(value, context=None):
+            value.append('junk')
+            return validator(value, context)
+        return f
+
+    v = V.excursion(appender(V.is_list()))
+    assert not base._is_pure(v)
+    data = [1]
+    result = v(data)
+    assert result == [1]
+    assert result is not data
+
+
+def test_schema_validate_query():
+    s = V.Schema(dict(
+        q=(V.strip, V.not_empty(msg='empty')),
+        page=V.to_integer(msg='integer'),
+        tag=(V.default([]), V.clamp_length(max=2, msg='tags'))),
+        list_fields=['tag'])
+    qs = 'q=caf%C3%A9+au+lait&tag=a&junk=%ZZ&page=2&tag=+b&q=ignored&page='
+    assert s.validate_query(qs) == dict(
+        q=u'café au lait', page=2, tag=['a', ' b'])
+    assert s.validate_query(b'q=x&page=1') == dict(
+        q='x', page=1, tag=[])
+    assert_invalid(
+        lambda: s.validate_query('q=&page&tag=x', keep_blank_values=True),
+        {'q': 'empty', 'page': 'integer',
+         None: 'Problems were found in the submitted data.'})
+    assert s.validate_query('q=x;page=1', separator=';') == dict(
+        q='x', page=1, tag=[])
+    assert_invalid(
+        lambda: s.validate_query('tag=a&tag=b&tag=c&q=x&page=1'),
+        {'tag': 'tags', None: 'Problems were found in the submitted data.'})
+
+    pairs = [
+        ('q', 'x'), ('tag', 'a'), ('extra', '1'), ('q', 'y'), ('page', '3')]
+    assert s.validate_pairs(pairs) == dict(q='x', page=3, tag=['a'])
+    s = V.Schema(dict(q=V.strip), filter_extra=False)
+    assert s.validate_pairs(pairs) == dict(
+        q='x', tag='a', extra='1', page='3')
+    s = V.Schema(dict(q=V.strip), allow_extra=False, msg='extra')
+    assert_invalid(lambda: s.validate_pairs(pairs), {None: 'extra'})
+
+    # list fields that aren't given at all are empty lists
+    s = V.Schema(dict(tags=V.is_list()), list_fields=['tags', 'junk'])
+    assert s.validate_query('x=1') == dict(tags=[])
+    assert s.validate_pairs([]) == dict(tags=[])
+    s = V.Schema(dict(tags=V.is_list()), list_fields=['tags'],
+                 filter_missing=True)
+    assert s.validate_query('x=1') == dict()
+
+
+def test_schema_validate_json():
+    s = V.Schema({
+        'name': (V.strip, V.not_empty(msg='empty')),
+        'tags': (V.default([]), V.clamp_length(max=3, msg='tags')),
+        ('a', 'b'): V.fields_equal(msg='equal')})
+    bodies = [
+        '{"name": " x ", "tags": [1, 2], "a": 1, "b": 1}',
+        b' {"name":"y","junk":{"k":[1,2.5e3,true,null,"\\u00e9"]}} ',
+        '{"name": "", "tags": [1, 2, 3, 4], "a": 1, "b": 2}',
+        '{"junk": [], "junk2": {}, "name": "z", "name": "w"}',
+        '{}',
+    ]
+    for body in bodies:
+        try:
+            expected = s(json.loads(body))
+        except V.Invalid as e:
+            with py.test.raises(V.Invalid) as e2:
+                s.validate_json(body)
+            assert e2.value.unpack_errors() == e.unpack_errors()
+        else:
+            assert s.validate_json(body) == expected
+
+    for body in ['{"name": "x",}', '{"junk": [1,]}', '{"junk": tru}',
+                 '{"name": "x"} x', '{"junk": {"a" 1}}', '']:
+        py.test.raises(ValueError, s.validate_json, body)
+    for body in ['[1]', '"x"']:
+        py.test.raises(AttributeError, s.validate_json, body)
+
+
+def test_schema_validate_json_limits():
+    s = V.Schema(dict(name=V.strip), max_items=2, max_depth=3, max_bytes=20,
+                 max_keys=4)
+    assert s.validate_json('{"name": "x", "ok": [[1, 2]]}') == dict(name='x')
+    for body, error in [
+        ('{"junk": [1, 2, 3], "name": 1', 'too many items'),
+        ('{"junk": [[[1]]], "name": [', 'too deeply nested'),
+        ('{"junk": "%s", "name": [' % ('x' * 20), 'too much data'),
+        ('{"a": 1, "b": 2, "c": 3, "d": {"e": 1}, "name": [', 'too many keys'),
+        ('{"name": ["abcdefghijklmnopqrstuvwxyz"]}', 'too much data'),
+        # limits are checked before a kept value is decoded
+        ('{"name": ["abcdefghijklmnopqrstuvwxyz", ', 'too much data'),
+    ]:
+        assert_invalid(lambda: s.validate_json(body), {None: error})
+
+    s = V.Schema(dict(name=V.strip), allow_extra=False, msg='extra')
+    assert_invalid(lambda: s.validate_json('{"junk": 1, "name": ['),
+                   {None: 'extra'})
+    s = V.Schema(dict(name=V.strip), filter_extra=False)
+    assert s.validate_json('{"name": " x ", "junk": [1]}') == dict(
+        name='x', junk=[1])
+
+    # a repeated key counts once, as json.loads() keeps only the last
+    s = V.Schema(dict(a=V.to_integer()), max_keys=3, max_bytes=4)
+    for body in ['{"a": 1, "a": 2, "a": 3, "a": 3}',
+                 '{"a": "12", "a": 3}',
+                 '{"b": {"c": 1, "c": 2, "c": 3, "c": 4}, "a": 3}',
+                 '{"a": 3, "b": [{"c": "1", "c": "1"}]}']:
+        assert s.validate_json(body) == s(json.loads(body)) == dict(a=3)
+    assert_invalid(lambda: s.validate_json('{"a": 1, "b": 2, "c": 3, "d": 4}'),
+                   {None: 'too many keys'})
+
+    s = V.Schema(dict(name=V.strip), filter_extra=False)
+    # without limits, values are only decoded
+    walk = base._Limits.walk
+    base._Limits.walk = None
+    try:
+        assert s.validate_json('{"name": " x ", "junk": [1]}') == dict(
+            name='x', junk=[1])
+    finally:
+        base._Limits.walk = walk
+
+
+def test_interned_validators():
+    assert V.not_empty() is V.not_empty()
+    assert V.clamp_length(max=255) is V.clamp_length(max=255)
+    assert V.clamp(max=1) is not V.clamp(max=1.0)
+    assert V.clamp(max=1) is not V.clamp(max=True)
+    assert V.regex('a') is not V.regex('b')
+    assert V.not_empty(msg={'notempty': 'x'}) is not V.not_empty(
+        msg={'notempty': 'x'})
+    assert V.belongs(['a']) is not V.belongs(['a'])
+    assert V.belongs(('a',)) is V.belongs(('a',))
+    assert V.equal((1,)) is V.equal((1,))
+    assert V.equal((True,)) is not V.equal((1,))
+    assert V.equal(((1,),)) is not V.equal(((1.0,),))
+    assert V.belongs(frozenset([1])) is not V.belongs(frozenset([True]))
+    assert V.all_of(V.strip, V.not_empty()) is V.all_of(
+        V.strip, V.not_empty())
+    # default() returns its argument itself, and values that are
+    # equal aren't always alike
+    one, zero = V.default(decimal.Decimal('1')), V.default(0.0)
+    assert str(V.default(decimal.Decimal('1.00'))(None)) == '1.00'
+    assert str(V.default(-0.0)(None)) == '-0.0'
+    assert V.default((True,))(None) == (True,)
+    assert V.not_empty.__name__ == 'not_empty'
+    assert V.not_empty().__name__ == 'not_empty'
+
+    v = V.clamp(min=12345)
+    count = len(base._interned_validators)
+    del v
+    gc.collect()
+    assert len(base._interned_validators) < count
+
+
 def test_confirm_type():
     v = V.confirm_type((int, float), 'not a number')
     assert v.__name__ == "confirm_type"
@@ -832,6 +1326,57 @@ def test_confirm_type():
         {None: 'not a number'})
 
 
+def test_dispatch_on_type():
+    v = V.dispatch_on_type({
+        int: V.clamp(min=0, msg='clamp'),
+        str: (V.strip, V.not_empty(msg='not_empty')),
+        (list, tuple): V.to_list((list, tuple)),
+    }, msg='type')
+    assert v.__name__ == 'dispatch_on_type'
+    assert v(3) == 3
+    assert v(True) is True
+    assert v(' x ') == 'x'
+    assert v((1, 2)) == (1, 2)
+    assert v([1]) == [1]
+    assert_invalid(lambda: v(-1), {None: 'clamp'})
+    assert_invalid(lambda: v('  '), {None: 'not_empty'})
+    assert_invalid(lambda: v(1.5), {None: 'type'})
+    assert_invalid(lambda: V.dispatch_on_type({})(None),
+                   {None: 'unexpected type'})
+
+    class Name(str):
+        pass
+
+    assert v(Name(' y ')) == 'y'
+    v = V.dispatch_on_type({int: V.to_string()}, default=V.to_integer())
+    assert v(2) == '2'
+    assert v('2') == 2
+
+
+def test_union():
+    created = V.Schema(dict(
+        type=V.equal('created'), id=V.to_integer(msg='integer')))
+    deleted = V.Schema(dict(
+        type=V.equal('deleted'), id=V.to_integer(msg='integer'),
+        reason=V.not_empty(msg='reason')))
+    v = V.union('type', dict(created=created, deleted=deleted), msg='unknown')
+    assert v.__name__ == 'union'
+    assert v(dict(type='created', id='1')) == dict(type='created', id=1)
+    data = dict(type='deleted', id='x', reason='')
+    with py.test.raises(V.Invalid) as e:
+        v(data)
+    with py.test.raises(V.Invalid) as expected:
+        deleted(data)
+    assert e.value.unpack_errors() == expected.value.unpack_errors()
+    for data in (dict(type='moved', id=1), dict(id=1), dict(type=[]), None):
+        assert_invalid(lambda: v(data), {'type': 'unknown'})
+    assert_invalid(lambda: V.union('kind', {})({}),
+                   {'kind': 'unknown type'})
+
+    v = V.union('type', dict(created=created), default=V.to_list())
+    assert v(dict(type='moved')) == [dict(type='moved')]
+
+
 def test_translate():
     v = V.translate(dict(y=True, f=False),  'dong')
     assert v.__name__ == "translate"
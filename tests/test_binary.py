@@ -0,0 +1,63 @@
+# -*- coding: utf-8 -*-
+
+import validino as V
+from util import assert_invalid
+
+
+def test_bytes_strip():
+    assert V.bytes_strip(b'  foo \r\n') == b'foo'
+    assert V.bytes_strip(bytearray(b'\tfoo ')) == bytearray(b'foo')
+    buf = b'  foo bar  '
+    view = V.bytes_strip(memoryview(buf))
+    assert isinstance(view, memoryview)
+    assert view.obj is buf
+    assert view == b'foo bar'
+    assert V.bytes_strip(memoryview(b'   ')) == b''
+    assert V.bytes_strip(None) is None
+
+
+def test_bytes_clamp_length():
+    v = V.bytes_clamp_length(min=2, max=4, msg=dict(minlen='haha'))
+    assert v.__name__ == "bytes_clamp_length"
+    for value in (b'abc', bytearray(b'abc'), memoryview(b'abc')):
+        assert v(value) is value
+    assert_invalid(lambda: v(b'a'), {None: 'haha'})
+    assert_invalid(lambda: v(memoryview(b'abcde')), {None: 'too long'})
+    text = "\N{GREEK CAPITAL LETTER OMEGA}\N{SNOWMAN}ab".encode('utf8')
+    assert_invalid(lambda: v(text), {None: 'too long'})
+    v = V.bytes_clamp_length(max=4, codepoints=True)
+    assert v(text) == text
+    assert v(memoryview(text)) == text
+    assert_invalid(lambda: v(text + b'!'), {None: 'too long'})
+
+
+def test_bytes_regex():
+    v = V.bytes_regex(rb'shrubbery\d{3}$', 'regex')
+    assert v.__name__ == "bytes_regex"
+    assert v(memoryview(b'shrubbery222')) == b'shrubbery222'
+    assert_invalid(lambda: v(b'buy a shrubbery333, ok?'), {None: 'regex'})
+
+
+def test_is_ascii():
+    v = V.is_ascii(msg='cats')
+    assert v(b'parrots') == b'parrots'
+    assert v(memoryview(b'parrots')) == b'parrots'
+    assert_invalid(lambda: v('\N{SNOWMAN}'.encode('utf8')), {None: 'cats'})
+
+
+def test_is_utf8():
+    v = V.is_utf8()
+    text = "\N{GREEK CAPITAL LETTER OMEGA} my gawd".encode('utf8')
+    assert v(text) is text
+    assert v(bytearray(text)) == text
+    assert v(memoryview(text)) == text
+    for bad in (b'\xff', text[:1], b'\xed\xa0\x80', b'\xc0\xaf'):
+        assert_invalid(lambda: v(bad), {None: 'encoding error'})
+
+
+def test_bytes_to_integer():
+    v = V.bytes_to_integer(msg='no')
+    assert v(b' 42') == 42
+    assert v(bytearray(b'7')) == 7
+    assert v(memoryview(b'-3')) == -3
+    assert_invalid(lambda: v(b'four'), {None: 'no'})
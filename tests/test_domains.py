@@ -0,0 +1,85 @@
+# -*- coding: utf-8 -*-
+
+import pickle
+
+import py
+
+import validino as V
+from validino import domains
+from util import assert_invalid
+
+
+WORDS = ['apple', 'banana', 'cherry', 'damson', 'elder', 'fig', u'grüne']
+
+
+def test_SortedFileDomain(tmpdir):
+    path = str(tmpdir.join('fruit.txt'))
+    assert V.build_domain(WORDS + ['fig'], path) == len(WORDS)
+    domain = V.SortedFileDomain(path)
+    for word in WORDS:
+        assert word in domain
+        assert word.encode('utf8') in domain
+    for word in ['', 'a', 'aaa', 'apples', 'coconut', 'zebra', 'fig\nfig', 3]:
+        assert word not in domain
+    assert list(domain) == sorted(w.encode('utf8') for w in WORDS)
+
+    v = V.belongs(domain, msg='belongs')
+    assert v('cherry') == 'cherry'
+    assert_invalid(lambda: v('coconut'), {None: 'belongs'})
+    v = V.not_belongs(domain, msg='not_belongs')
+    assert v('coconut') == 'coconut'
+    assert_invalid(lambda: v('cherry'), {None: 'not_belongs'})
+
+    domain = pickle.loads(pickle.dumps(domain))
+    assert 'damson' in domain
+    domain.close()
+
+
+def test_SortedFileDomain_sizes(tmpdir):
+    path = str(tmpdir.join('numbers.txt'))
+    for n in (0, 1, 2, 3, 100):
+        values = ['%05d' % (i * 2) for i in range(n)]
+        V.build_domain(values, path)
+        with V.SortedFileDomain(path) as domain:
+            for i in range(n * 2 + 1):
+                assert (('%05d' % i) in domain) == (i % 2 == 0 and i < n * 2)
+
+
+def test_BloomFilter(tmpdir):
+    bf = V.BloomFilter(1000, error_rate=0.01)
+    for i in range(1000):
+        bf.add('word%d' % i)
+    assert all(('word%d' % i) in bf for i in range(1000))
+    false = sum(('other%d' % i) in bf for i in range(10000))
+    assert false < 300
+    py.test.raises(ValueError, bf.add, 3)
+
+    path = str(tmpdir.join('words.bloom'))
+    bf.save(path)
+    loaded = V.BloomFilter.load(path)
+    assert (loaded.bits, loaded.hashes) == (bf.bits, bf.hashes)
+    assert all(('word%d' % i) in loaded for i in range(1000))
+    assert 'word7' in pickle.loads(pickle.dumps(loaded))
+    assert 'word7' in pickle.loads(pickle.dumps(bf))
+    py.test.raises(ValueError, V.BloomFilter.load, __file__)
+
+
+def test_bloom_in_front(tmpdir):
+    path = str(tmpdir.join('fruit.txt'))
+    bloom = str(tmpdir.join('fruit.bloom'))
+    V.build_domain(WORDS, path, bloom_path=bloom)
+    domain = V.SortedFileDomain(path, bloom=bloom)
+    assert all(w in domain for w in WORDS)
+    assert 'coconut' not in domain
+    assert 'cherry' in pickle.loads(pickle.dumps(domain))
+
+
+def test_main(tmpdir, capsys):
+    source = tmpdir.join('in.txt')
+    source.write_binary(b'pear\r\nquince\n\napple\npear\n')
+    out = str(tmpdir.join('out.txt'))
+    bloom = str(tmpdir.join('out.bloom'))
+    domains.main([str(source), out, '--bloom', bloom])
+    assert 'wrote 3 values' in capsys.readouterr().out
+    assert open(out, 'rb').read() == b'apple\npear\nquince\n'
+    assert 'quince' in V.SortedFileDomain(out, bloom=bloom)
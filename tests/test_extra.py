@@ -1,7 +1,13 @@
 # -*- coding: utf-8 -*-
 
+import hashlib
+import io
+import urllib.parse
+
+import py
 
 import validino as V
+from validino import artifact
 from util import assert_invalid
 
 
@@ -18,3 +24,173 @@ def test_url():
     assert v(u) == u
     v = V.url(True)
     assert v(u) == u
+
+
+def test_parse_url():
+    v = V.url()
+    for u in ('http://www.wnyc.org/', 'https://a.com?q=1#top',
+              'http://a.com/x;y?z', 'http://a.com/?', 'http://a.com/ b'):
+        assert v(u) == urllib.parse.urlunparse(urllib.parse.urlparse(u))
+    assert_invalid(lambda: v('ftp://example.com/'),
+                   {None: 'schema not allowed'})
+    v = V.url(schemas=('http', 'https', ''), default_host='example.com')
+    assert v('//a.com/') == 'http://a.com/'
+    assert v('/path') == 'http://example.com/path'
+    s = V.Schema(dict(home=V.url()))
+    assert s(dict(home='http://a.com/')) == dict(home='http://a.com/')
+
+
+def test_normalize_url():
+    v = V.url(normalize=True)
+    assert v('http://WWW.Example.COM:80/A?b') == 'http://www.example.com/A?b'
+    assert v('https://b\N{LATIN SMALL LETTER U WITH DIAERESIS}cher.de:443/') \
+        == 'https://xn--bcher-kva.de/'
+    assert v('http://[::1]:8080/') == 'http://[::1]:8080/'
+    assert v('http://U:P@Host.com:81') == 'http://U:P@host.com:81'
+    assert_invalid(lambda: v('http://host.com:port/'),
+                   {None: 'invalid host'})
+
+    s = V.Schema(dict(home=V.url(normalize=True)))
+    assert s(dict(home='http://A.com:80/')) == dict(home='http://a.com/')
+    loaded = artifact.loads(artifact.dumps(s))
+    assert loaded(dict(home='http://A.com:80/')) == dict(home='http://a.com/')
+
+
+def test_email():
+    v = V.email(msg=dict(email='bad address'))
+    assert v.__name__ == "email"
+    assert v('smull@example.com') == 'smull@example.com'
+    for value in ('smull', 'smull@', '@example.com', 'sm ull@example.com',
+                  'smull@example', 'smull@example.com\n', 'a@b@example.com',
+                  None):
+        assert_invalid(lambda: v(value), {None: 'bad address'})
+
+    v = V.email("Please enter a valid email address")
+    assert v('smull@example.com') == 'smull@example.com'
+    assert_invalid(lambda: v('smull'),
+                   {None: "Please enter a valid email address"})
+
+
+class FakeClock(object):
+    now = 0.0
+
+    def __call__(self):
+        return self.now
+
+
+def test_email_domain_check():
+    looked_up = []
+    def resolver(domain):
+        looked_up.append(domain)
+        return domain != 'nowhere.com'
+    clock = FakeClock()
+    checker = V.DomainChecker(resolver, ttl=60, maxsize=2, clock=clock)
+    v = V.email(check_domain=checker)
+    assert v.blocking
+    assert v('a@example.com') == 'a@example.com'
+    assert v('b@EXAMPLE.com') == 'b@EXAMPLE.com'
+    assert_invalid(lambda: v('c@nowhere.com'), {None: 'domain does not exist'})
+    assert_invalid(lambda: v('d@nowhere.com'), {None: 'domain does not exist'})
+    assert looked_up == ['example.com', 'nowhere.com']
+
+    clock.now = 61
+    v('a@example.com')
+    assert looked_up[-1] == 'example.com'
+    v('a@other.com')
+    v('a@third.com')
+    v('a@example.com')
+    assert looked_up == [
+        'example.com', 'nowhere.com', 'example.com', 'other.com',
+        'third.com', 'example.com']
+
+
+def test_domain_checker_concurrency():
+    import threading
+    lock = threading.Lock()
+    running = []
+    peak = []
+    def resolver(domain):
+        with lock:
+            running.append(domain)
+            peak.append(len(running))
+        threading.Event().wait(0.01)
+        with lock:
+            running.remove(domain)
+        return True
+    checker = V.DomainChecker(resolver, max_concurrent=2)
+    threads = [
+        threading.Thread(target=checker, args=('d%d.com' % (i % 5),))
+        for i in range(20)]
+    for t in threads:
+        t.start()
+    for t in threads:
+        t.join()
+    assert max(peak) <= 2
+    # each domain is looked up by at most max_concurrent threads
+    assert len(peak) <= 10
+
+
+def test_upload():
+    png = b'\x89PNG\r\n\x1a\n' + b'\x00' * 1000
+    v = V.upload(digest='sha256')
+    info = v(io.BytesIO(png))
+    assert info == V.FileInfo(
+        1008, 'image/png', hashlib.sha256(png).hexdigest(), 3)
+    assert v([b'%P', b'DF-1.4\n', b'x']).content_type == 'application/pdf'
+    assert v([]) == V.FileInfo(
+        0, 'text/plain', hashlib.sha256().hexdigest(), 0)
+    assert_invalid(lambda: v(b'bytes'), {None: 'not a file'})
+
+    written = []
+    v = V.upload(max_size=1000, types=['image/png'], sink=written.append,
+                 chunk_size=100, msg='upload')
+    assert_invalid(lambda: v(io.BytesIO(png)), {None: 'upload'})
+    assert len(written) == 10
+    del written[:]
+    assert_invalid(lambda: v(io.BytesIO(b'text')), {None: 'upload'})
+    v = V.upload(types=['image/png'], sink=written.append, chunk_size=100)
+    assert_invalid(lambda: v(io.BytesIO(b'text' * 200)),
+                   {None: 'file type not allowed'})
+    # nothing of a file of the wrong type reaches the sink
+    assert written == []
+    assert v(io.BytesIO(png)).size == 1008
+    assert b''.join(written) == png
+
+
+def test_upload_memoryview_chunks():
+    png = b'\x89PNG\r\n\x1a\n' + b'\x00' * 1000
+
+    def chunks(data, size):
+        # one buffer, reused for every chunk, as readinto() fills it
+        buf = bytearray(size)
+        f = io.BytesIO(data)
+        while True:
+            n = f.readinto(buf)
+            if not n:
+                return
+            yield memoryview(buf)[:n]
+
+    written = []
+    v = V.upload(types=['image/png'], digest='sha256', max_lines=3,
+                 sink=written.append)
+    assert v(chunks(png, 100)) == V.FileInfo(
+        1008, 'image/png', hashlib.sha256(png).hexdigest(), 3)
+    assert b''.join(written) == png
+    assert_invalid(lambda: v(['text']), {None: 'not a file'})
+
+
+def test_upload_checksum_and_lines():
+    text = b'one\ntwo\nthree'
+    digest = hashlib.md5(text).hexdigest()
+    v = V.upload(digest='md5', checksum=digest.upper(), max_lines=3)
+    assert v(io.BytesIO(text)) == V.FileInfo(13, 'text/plain', digest, 3)
+    assert_invalid(lambda: v(io.BytesIO(text + b'\n')),
+                   {None: 'checksum mismatch'})
+    v = V.upload(max_lines=2, chunk_size=4)
+    assert_invalid(lambda: v(io.BytesIO(text)), {None: 'too many lines'})
+    assert v(io.BytesIO(b'one\ntwo\n')).lines == 2
+    py.test.raises(ValueError, V.upload, checksum=digest)
+
+    s = V.Schema(dict(name=V.not_empty(), file=V.upload(max_size=4)))
+    assert s(dict(name='x', file=[b'abcd'])) == dict(
+        name='x', file=V.FileInfo(4, 'text/plain', None, 1))
@@ -0,0 +1,78 @@
+# -*- coding: utf-8 -*-
+
+import validino as V
+from util import assert_invalid
+
+
+catalog = V.Catalog(
+    {
+        'en': {'schema.error': 'Please fix the errors'},
+        'fr': {
+            'schema.error': 'Veuillez corriger les erreurs',
+            'notempty': 'Une valeur est requise',
+            'maxlen': 'Trop long'},
+        'fr_CA': {'maxlen': 'Beaucoup trop long'}},
+    default='en')
+
+
+def make_schema(**kw):
+    return V.Schema(
+        dict(
+            name=V.not_empty(),
+            nickname=V.clamp_length(max=3),
+            age=V.to_integer(msg=dict(integer='a number please'))),
+        messages=catalog,
+        **kw)
+
+
+def test_Catalog_table():
+    assert catalog.table('fr_CA') == {
+        'schema.error': 'Veuillez corriger les erreurs',
+        'notempty': 'Une valeur est requise',
+        'maxlen': 'Beaucoup trop long'}
+    assert catalog.table('fr_BE') is catalog.table('fr')
+    assert catalog.table('de') is catalog.table(None)
+    assert catalog.table(None) == {'schema.error': 'Please fix the errors'}
+
+
+def test_Schema_messages():
+    s = make_schema()
+    data = dict(name='', nickname='bobby', age='x')
+    assert_invalid(lambda: s(data, dict(locale='fr_CA')), {
+        None: 'Veuillez corriger les erreurs',
+        'name': 'Une valeur est requise',
+        'nickname': 'Beaucoup trop long',
+        'age': 'a number please'})
+    assert_invalid(lambda: s(data), {
+        None: 'Please fix the errors',
+        'name': 'A non-empty value was expected',
+        'nickname': 'too long',
+        'age': 'a number please'})
+    # the catalog is only active during the call
+    assert_invalid(lambda: V.not_empty()(''),
+                   {None: 'A non-empty value was expected'})
+
+
+def test_Schema_messages_executor():
+    from concurrent.futures import ThreadPoolExecutor
+    s = V.Schema(
+        dict(
+            name=V.blocking(V.not_empty()),
+            nickname=V.blocking(V.clamp_length(max=3))),
+        messages=catalog,
+        executor=ThreadPoolExecutor(2))
+    assert_invalid(lambda: s(dict(name='', nickname='bobby'),
+                             dict(locale='fr')), {
+        None: 'Veuillez corriger les erreurs',
+        'name': 'Une valeur est requise',
+        'nickname': 'Trop long'})
+
+
+def test_Catalog_activate():
+    with catalog.activate('fr'):
+        assert_invalid(lambda: V.not_empty()(''),
+                       {None: 'Une valeur est requise'})
+        assert_invalid(lambda: V.not_empty('explicit')(''),
+                       {None: 'explicit'})
+    assert_invalid(lambda: V.not_empty()(''),
+                   {None: 'A non-empty value was expected'})
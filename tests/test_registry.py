@@ -0,0 +1,75 @@
+# -*- coding: utf-8 -*-
+
+import validino as V
+
+
+CONFIG = {
+    'acme': dict(name=255, code=8),
+    'globex': dict(name=255, code=8),
+    'initech': dict(name=64),
+}
+
+
+def build(tenant):
+    return V.Schema(dict(
+        (field, (V.strip, V.not_empty(), V.clamp_length(max=length)))
+        for field, length in CONFIG[tenant].items()
+    ))
+
+
+def test_SchemaRegistry():
+    schemas = V.SchemaRegistry(build)
+    assert schemas['acme'](dict(name=' x ', code='y')) == dict(
+        name='x', code='y')
+    assert schemas['acme'] is schemas.get('acme')
+    assert schemas['globex'] is schemas['acme']
+    assert schemas['initech'] is not schemas['acme']
+    assert 'acme' in schemas
+    assert len(schemas) == 3
+    stats = schemas.stats()
+    assert stats['hits'] == 4
+    assert stats['misses'] == 3
+    assert stats['deduplicated'] == 1
+    assert stats['build_time'] > 0
+    assert stats['evictions'] == 0
+
+    schemas.invalidate('acme')
+    assert 'acme' not in schemas
+    assert schemas.get('acme') is None
+    assert schemas.get('acme', 'missing') == 'missing'
+    assert schemas.stats()['misses'] == 3
+    schemas['acme']
+    assert schemas.stats()['misses'] == 4
+    schemas.clear()
+    assert len(schemas) == 0
+
+
+def test_SchemaRegistry_shares_sub_validators():
+    schemas = V.SchemaRegistry(build)
+    a = schemas['acme']
+    i = schemas['initech']
+    a(dict(name='x', code='y'))
+    i(dict(name='x'))
+    assert a._validators['name'] is not i._validators['name']
+    assert a.subvalidators['name'][1] is i.subvalidators['name'][1]
+
+
+def test_SchemaRegistry_eviction():
+    schemas = V.SchemaRegistry(build, maxsize=2)
+    schemas['acme']
+    schemas['initech']
+    schemas['acme']
+    schemas['globex']
+    assert 'initech' not in schemas
+    assert schemas.stats()['evictions'] == 1
+
+    schemas = V.SchemaRegistry(
+        build, maxsize=None, cost=lambda s: len(s.subvalidators),
+        max_cost=3)
+    schemas['acme']
+    schemas['initech']
+    assert schemas.stats()['cost'] == 3
+    schemas['globex']
+    assert 'acme' not in schemas
+    assert 'initech' in schemas
+    assert schemas.stats()['cost'] == 3
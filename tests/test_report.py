@@ -0,0 +1,111 @@
+# -*- coding: utf-8 -*-
+
+import io
+import json
+
+import validino as V
+
+
+schema = V.Schema(dict(
+    id=V.to_integer(msg='not a number'),
+    name=V.not_empty(msg='required')), msg='bad row')
+
+
+def rows(n):
+    for i in range(n):
+        if i % 10 < 3:
+            yield dict(id='x', name='ok')
+        elif i % 10 == 5:
+            yield dict(id='x', name='')
+        else:
+            yield dict(id=str(i), name='ok')
+
+
+def test_ErrorCollector():
+    errors = V.ErrorCollector()
+    passed = list(errors.validate(schema, rows(1000)))
+    assert len(passed) == 600
+    assert passed[0] == (3, dict(id=3, name='ok'))
+    assert errors.failed == 400
+    assert len(errors) == 2
+    assert errors.by_field() == {'id': 400, 'name': 100, None: 400}
+    assert errors.by_message() == {
+        'not a number': 400, 'required': 100, 'bad row': 400}
+
+    report = list(errors.report())
+    assert report[0] == dict(
+        errors={'id': 'not a number', None: 'bad row'},
+        count=300,
+        rows=[[i, i + 3] for i in range(0, 1000, 10)])
+    assert report[1]['count'] == 100
+    assert report[1]['rows'][:2] == [[5, 6], [15, 16]]
+
+    out = io.StringIO()
+    errors.write(out)
+    lines = [json.loads(l) for l in out.getvalue().splitlines()]
+    assert lines[0]['summary']['failed'] == 400
+    assert lines[0]['summary']['fields'] == {
+        'id': 400, 'name': 100, 'null': 400}
+    assert lines[1]['count'] == 300
+    assert len(lines) == 3
+
+
+def test_ErrorCollector_add():
+    errors = V.ErrorCollector()
+    errors.add(7, {'tags': ['too long', 'bad']})
+    errors.add(8, {'tags': ['too long', 'bad']})
+    errors.add(3, V.Invalid('oops'))
+    errors.add(4, {None: 'oops'})
+    assert len(errors) == 2
+    assert errors.by_message() == {'too long': 2, 'bad': 2, 'oops': 2}
+    assert list(errors.report()) == [
+        dict(errors={'tags': ['too long', 'bad']}, count=2, rows=[[7, 9]]),
+        dict(errors={None: 'oops'}, count=2, rows=[[3, 5]]),
+    ]
+
+
+def test_ErrorCollector_nested():
+    schema = V.Schema(dict(
+        name=V.not_empty(msg='required'),
+        address=V.nested(
+            city=V.not_empty(msg='required'),
+            lines=V.nested_many(V.not_empty(msg='blank')))), msg='bad row')
+    errors = V.ErrorCollector()
+    records = [
+        dict(name='', address=dict(city='', lines=dict(a='x', b=''))),
+        dict(name='', address=dict(city='', lines=dict(b='', a='x'))),
+        dict(name='x', address=dict(city='y', lines=dict(a=''))),
+    ]
+    assert list(errors.validate(schema, records)) == []
+    assert len(errors) == 2
+    assert errors.by_field() == {'name': 2, 'address': 3, None: 3}
+    assert errors.by_message() == {'required': 4, 'blank': 3, 'bad row': 3}
+    report = list(errors.report())
+    assert report[0] == dict(
+        errors={'name': 'required', None: 'bad row',
+                'address': {'city': 'required', 'lines': {'b': 'blank'}}},
+        count=2,
+        rows=[[0, 2]])
+    assert report[1]['errors'] == {
+        'address': {'lines': {'a': 'blank'}}, None: 'bad row'}
+
+    out = io.StringIO()
+    errors.write(out)
+    lines = [json.loads(l) for l in out.getvalue().splitlines()]
+    assert lines[0]['summary']['messages'] == {
+        'required': 4, 'blank': 3, 'bad row': 3}
+    assert lines[1]['errors']['address']['lines'] == {'b': 'blank'}
+
+
+def test_ErrorCollector_plural_keys():
+    schema = V.Schema({
+        'a': V.to_integer(msg='not a number'),
+        ('a', 'b'): V.only_one_of(msg='only one')}, msg='bad row')
+    errors = V.ErrorCollector()
+    assert list(errors.validate(schema, [dict(a='1', b='2')])) == []
+    assert errors.by_field() == {('a', 'b'): 1, None: 1}
+    out = io.StringIO()
+    errors.write(out)
+    lines = [json.loads(l) for l in out.getvalue().splitlines()]
+    assert lines[0]['summary']['fields'] == {'a,b': 1, 'null': 1}
+    assert lines[1]['errors'] == {'a,b': 'only one', 'null': 'bad row'}
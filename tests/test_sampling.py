@@ -0,0 +1,76 @@
+# -*- coding: utf-8 -*-
+
+import validino as V
+
+
+schema = V.Schema(dict(
+    id=V.to_integer(msg="bad id"),
+    level=V.belongs(['info', 'error'])))
+
+
+def events(n, bad_every=None):
+    for i in range(n):
+        if bad_every and i % bad_every == 0:
+            yield dict(id='x%d' % i, level='info')
+        else:
+            yield dict(id=str(i), level='info')
+
+
+def run(sampler, records):
+    for record in records:
+        assert sampler(record) is record
+
+
+def test_Sampler_deterministic():
+    sampler = V.Sampler(schema, rate=0.1, key='id')
+    record = dict(id='7', level='info')
+    assert sampler(record) is record
+    sampler.reset()
+    run(sampler, events(10000))
+    stats = sampler.stats()
+    assert stats['seen'] == 10000
+    assert 800 < stats['sampled'] < 1200
+    assert stats['failed'] == 0
+
+    again = V.Sampler(schema, rate=0.1, key=lambda r: r['id'])
+    run(again, events(10000))
+    assert again.sampled == sampler.sampled
+
+
+def test_Sampler_passes_unsampled_records_through():
+    sampler = V.Sampler(schema, rate=0.0)
+    record = dict(id='x', level='bogus')
+    assert sampler(record) is record
+    sampler = V.Sampler(schema, rate=1.0)
+    assert sampler(record) is record
+    assert sampler.stats()['failed'] == 1
+    record = dict(id='1', level='info')
+    assert sampler(record) is record
+    assert sampler.stats()['failed'] == 1
+
+
+def test_Sampler_error_stats_and_threshold():
+    draws = iter([0.05, 0.5] * 5000)
+    sampler = V.Sampler(
+        schema, rate=0.1, threshold=0.2, min_samples=50,
+        random=lambda: next(draws))
+    records = list(events(100, bad_every=4))
+    run(sampler, records[:99])
+    stats = sampler.stats()
+    assert stats['sampled'] == 50
+    assert stats['failed'] == 25
+    assert stats['error_rate'] == 25 / 50
+    assert stats['field_failures'] == {'id': 25}
+    assert stats['full']
+
+    # every record is now validated, and bad ones are rejected
+    assert sampler(records[99]) == dict(id=99, level='info')
+    rejected = 0
+    for record in events(100, bad_every=4):
+        try:
+            assert sampler(record) == schema(record)
+        except V.Invalid:
+            rejected += 1
+    assert rejected == 25
+    assert sampler.stats()['failed'] == 50
+    assert sampler.stats()['sampled'] == 151
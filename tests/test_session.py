@@ -0,0 +1,96 @@
+# -*- coding: utf-8 -*-
+
+import py
+
+import validino as V
+
+
+def counting(validator, calls, name):
+    def f(value, context=None):
+        calls.append(name)
+        return validator(value, context)
+    return f
+
+
+def make_schema(calls):
+    return V.Schema({
+        'name': counting(V.not_empty(msg="name is empty"), calls, 'name'),
+        'email': counting(V.not_empty(), calls, 'email'),
+        'confirm': counting(V.to_string(), calls, 'confirm'),
+        'age': counting(V.to_integer(msg="not a number"), calls, 'age'),
+        ('email', 'confirm'): counting(
+            V.fields_equal(msg="emails differ", field='confirm'),
+            calls, 'equal')})
+
+
+def test_Session_reruns_changed_fields():
+    calls = []
+    session = V.Session(make_schema(calls))
+    data = dict(name='bob', email='a@b.c', confirm='a@b.c', age='3')
+    assert session(data) == dict(
+        name='bob', email='a@b.c', confirm='a@b.c', age=3)
+    assert sorted(calls) == ['age', 'confirm', 'email', 'equal', 'name']
+
+    del calls[:]
+    data = dict(data, age='4')
+    assert session(data)['age'] == 4
+    assert calls == ['age']
+
+    del calls[:]
+    data = dict(data, confirm='x@b.c')
+    with py.test.raises(V.Invalid) as e:
+        session(data)
+    assert sorted(calls) == ['confirm', 'equal']
+    assert session.errors == {
+        None: "Problems were found in the submitted data.",
+        'confirm': "emails differ"}
+    assert session.result is None
+
+    del calls[:]
+    data = dict(data, name='')
+    with py.test.raises(V.Invalid) as e:
+        session(data)
+    assert calls == ['name']
+    assert e.value.unpack_errors() == {
+        None: "Problems were found in the submitted data.",
+        'confirm': "emails differ",
+        'name': "name is empty"}
+
+
+def test_Session_matches_full_validation():
+    calls = []
+    schema = make_schema(calls)
+    session = V.Session(schema)
+    documents = [
+        dict(name='bob', email='a', confirm='a', age='3'),
+        dict(name='bob', email='a', confirm='b', age='x'),
+        dict(name='', email='b', confirm='b', age='x'),
+        dict(name='', email='b', confirm='b'),
+        dict(name='sally', email='b', confirm='b', age='7'),
+    ]
+    for data in documents:
+        try:
+            expected = schema(dict(data))
+        except V.Invalid as e:
+            expected = e.unpack_errors()
+        try:
+            result = session(dict(data))
+        except V.Invalid as e:
+            result = e.unpack_errors()
+        assert result == expected
+
+
+def test_Session_context_change():
+    calls = []
+    session = V.Session(make_schema(calls))
+    data = dict(name='bob', email='a', confirm='a', age='3')
+    session(data, dict(user=1))
+    del calls[:]
+    session(data, dict(user=1))
+    assert calls == []
+    session(data, dict(user=2))
+    assert len(calls) == 5
+    del calls[:]
+    session.reset()
+    session(data, dict(user=2))
+    assert len(calls) == 5
@@ -0,0 +1,85 @@
+# -*- coding: utf-8 -*-
+
+import multiprocessing
+import pickle
+
+import py
+
+import validino as V
+from util import assert_invalid
+
+
+CODES = {'GB': 'United Kingdom', 'FR': 'France', b'DE': ['Germany'],
+         7: {'seven': 7}, u'ÅL': None}
+
+
+def check_table(table):
+    assert len(table) == len(CODES)
+    assert dict(table) == CODES
+    assert sorted(map(repr, table)) == sorted(map(repr, CODES))
+    assert table['FR'] == 'France'
+    assert table[b'DE'] == ['Germany']
+    assert table[7] == {'seven': 7}
+    assert u'ÅL' in table
+    for key in ('DE', b'GB', '7', 8, None, 1.5):
+        assert key not in table
+        py.test.raises(KeyError, lambda: table[key])
+
+
+def test_SharedTable_shared_memory():
+    table = V.SharedTable.create(CODES)
+    try:
+        check_table(table)
+        attached = V.SharedTable.attach(table.name)
+        check_table(attached)
+        attached.close()
+        check_table(pickle.loads(pickle.dumps(table)))
+    finally:
+        table.unlink()
+
+
+def test_SharedTable_file(tmpdir):
+    path = str(tmpdir.join('codes.table'))
+    table = V.SharedTable.create(CODES, path=path)
+    check_table(table)
+    check_table(pickle.loads(pickle.dumps(table)))
+    check_table(V.SharedTable.open(path))
+    table.close()
+    py.test.raises(ValueError, V.SharedTable.open, __file__)
+
+
+def test_SharedTable_validators():
+    big = dict(('code%d' % i, i) for i in range(5000))
+    table = V.SharedTable.create(big)
+    try:
+        v = V.translate(table, msg='belongs')
+        assert all(v('code%d' % i) == i for i in range(5000))
+        assert_invalid(lambda: v('code5000'), {None: 'belongs'})
+        allowed = V.SharedTable.create(['red', 'green'])
+        v = V.belongs(allowed, msg='belongs')
+        assert v('red') == 'red'
+        assert_invalid(lambda: v('blue'), {None: 'belongs'})
+        assert allowed['green'] is None
+        allowed.unlink()
+        py.test.raises(TypeError, V.SharedTable.create, [1.5])
+    finally:
+        table.unlink()
+
+
+def translate_in_worker(args):
+    table, value = args
+    return V.translate(table)(value)
+
+
+def test_SharedTable_workers():
+    table = V.SharedTable.create(CODES)
+    try:
+        for method in ('fork', 'spawn'):
+            ctx = multiprocessing.get_context(method)
+            with ctx.Pool(2) as pool:
+                assert pool.map(
+                    translate_in_worker, [(table, 'FR'), (table, 'GB')]
+                ) == ['France', 'United Kingdom']
+        assert table['FR'] == 'France'
+    finally:
+        table.unlink()